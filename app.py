@@ -1,9 +1,21 @@
+import argparse
+import time
+
 from config import *
+from game_objects.bots import BOTS
 from game_objects.scene import StartScene
 from helpers import *
 
 
-def run_game(width, height, fps):
+def run_game(width, height, fps, game_options=None, ticks_per_second=CONSTS.TICKS_PER_SECOND):
+    """
+    Scenes are updated at a fixed rate and rendered as often as fps allows. Time passed since the last
+    frame is accumulated and spent on as many ticks as it holds, so a slow frame is followed by several
+    ticks instead of slowing the game down, and frames rather than ticks are dropped.
+    :param fps: maximum number of frames per second
+    :param game_options: renderer, players_count, width, height, bots and record_dir of every played GameScene
+    :param ticks_per_second: number of updates of the scene per second
+    """
     pygame.init()
     pygame.display.set_caption("Grab The Map")
     screen = pygame.display.set_mode((width, height))
@@ -12,11 +24,17 @@ def run_game(width, height, fps):
 
     active_scene = StartScene(screen,
                               'Grab The Map',
-                              pos=(CONSTS.WINDOW_WIDTH // 2, CONSTS.GRID_HEIGHT // 2))
+                              pos=(CONSTS.WINDOW_WIDTH // 2, CONSTS.GRID_HEIGHT // 2),
+                              game_options=game_options)
     # active_scene = GameScene(screen)
     endgame = False
+    tick_time = 1 / ticks_per_second
+    accumulator = 0.0  # time not yet simulated
+    last_time = time.perf_counter()
     while active_scene is not None and not endgame:
-        screen.fill(CONSTS.WHITE)
+        now = time.perf_counter()
+        accumulator = min(accumulator + now - last_time, CONSTS.MAX_CATCH_UP_TICKS * tick_time)
+        last_time = now
         pressed_keys = pygame.key.get_pressed()
 
         # Event filtering
@@ -25,22 +43,53 @@ def run_game(width, height, fps):
             quit_attempt = False  # условие выхода из игры
             if event.type == pygame.QUIT:
                 quit_attempt = True
+            if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                active_scene.invalidate()
             if quit_attempt:
                 active_scene.terminate()
             else:
                 filtered_events.append(event)
 
         active_scene.process_input(filtered_events, pressed_keys)
-        status = active_scene.update()
-        if status['status'] == 'endgame':
-            endgame = True
-        active_scene.render()
+        while accumulator >= tick_time and active_scene.next_scene is active_scene and not endgame:
+            status = active_scene.update()
+            accumulator -= tick_time
+            if status['status'] == 'endgame':
+                endgame = True
+        if active_scene.redraw_all:
+            screen.fill(CONSTS.WHITE)
+        dirty_rects = active_scene.render(min(accumulator / tick_time, 1))
 
         active_scene = active_scene.next_scene
 
-        pygame.display.flip()
+        if dirty_rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(dirty_rects)
         clock.tick(fps)
 
 
+def main():
+    parser = argparse.ArgumentParser(description='Grab The Map')
+    parser.add_argument('--width', type=int, default=CONSTS.X_CELLS_COUNT, help='board width in cells')
+    parser.add_argument('--height', type=int, default=CONSTS.Y_CELLS_COUNT, help='board height in cells')
+    parser.add_argument('--players', type=int, default=2,
+                        help='number of players, the first two are controlled from the keyboard')
+    parser.add_argument('--bots', choices=sorted(BOTS), default=None,
+                        help='bot which drives the players beyond the first two, they only go straight without one')
+    parser.add_argument('--record-dir', default=None, help='directory to record every match to')
+    parser.add_argument('--renderer', choices=['cells', 'surface'], default=CONSTS.RENDERER,
+                        help='boards of other than the default size are always drawn by the surface renderer')
+    args = parser.parse_args()
+    run_game(CONSTS.WINDOW_WIDTH, CONSTS.GRID_HEIGHT, CONSTS.FPS, {
+        'renderer': args.renderer,
+        'players_count': args.players,
+        'width': args.width,
+        'height': args.height,
+        'bots': args.bots,
+        'record_dir': args.record_dir,
+    })
+
+
 if __name__ == '__main__':
-    run_game(CONSTS.WINDOW_WIDTH, CONSTS.GRID_HEIGHT, CONSTS.FPS)
+    main()
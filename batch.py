@@ -0,0 +1,103 @@
+"""
+Batch runner: plays a range of seeded headless matches on every CPU core
+and streams the result of every match as a JSON line to the output file, after a header line
+with the options of the run. An interrupted run is resumed by starting it again with the same
+options and output file.
+
+python batch.py --seeds 0 1000 --players 4 --width 78 --height 30 --output results.jsonl
+"""
+import argparse
+import json
+import os
+import random
+import time
+from multiprocessing import Pool
+
+from config import CONSTS
+from game_objects.bots import BOTS
+from headless import run_headless, random_inputs
+
+
+def play_match(task):
+    """
+    :param task: seed and options of the match
+    :return: summary of the match
+    """
+    seed, options = task
+    result = run_headless(options['mode'], options['max_ticks'],
+                          random_inputs(random.Random(seed), options['turn_chance']), seed,
+                          players_count=options['players'], width=options['width'], height=options['height'],
+                          bots=options['bots'])
+    return {'seed': seed, 'options': options, **result}
+
+
+def read_finished_seeds(path, options):
+    """
+    Read the output file of an interrupted run, the line cut by the interruption is dropped
+    and its match is played again
+    :param options: options of the run, the file must have been started with the same ones
+    :return: seeds of the matches already written to the output file
+    """
+    if not os.path.exists(path):
+        return set()
+    with open(path, 'rb+') as results:
+        content = results.read()
+        end = content.rfind(b'\n') + 1
+        results.truncate(end)
+    lines = content[:end].decode().splitlines()
+    if not lines:
+        return set()
+    results = [json.loads(line) for line in lines]
+    # the first line is the header with the options of the run
+    if results[0]['options'] != options:
+        raise SystemExit(f"{path} was started with other options {results[0]['options']}, "
+                         f"run with them or choose another output file")
+    return {result['seed'] for result in results if 'seed' in result}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seeds', type=int, nargs=2, metavar=('FIRST', 'STOP'), default=[0, 100],
+                        help='range of match seeds, the stop seed is not included')
+    parser.add_argument('--mode', choices=['classic', 'timeLIMIT'], default='classic')
+    parser.add_argument('--players', type=int, default=2)
+    parser.add_argument('--width', type=int, default=CONSTS.X_CELLS_COUNT, help='board width in cells')
+    parser.add_argument('--height', type=int, default=CONSTS.Y_CELLS_COUNT, help='board height in cells')
+    parser.add_argument('--bots', choices=sorted(BOTS), default=None, help='bot of the players beyond the first two')
+    parser.add_argument('--max-ticks', type=int, default=5000, help='a match is stopped after that many ticks')
+    parser.add_argument('--turn-chance', type=float, default=0.2,
+                        help='chance of a random turn of every player on every tick')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='number of processes')
+    parser.add_argument('--chunksize', type=int, default=8, help='matches sent to a process at once')
+    parser.add_argument('--output', default='results.jsonl')
+    args = parser.parse_args()
+
+    options = {
+        'mode': args.mode,
+        'players': args.players,
+        'width': args.width,
+        'height': args.height,
+        'bots': args.bots,
+        'max_ticks': args.max_ticks,
+        'turn_chance': args.turn_chance,
+    }
+    finished = read_finished_seeds(args.output, options)
+    tasks = [(seed, options) for seed in range(*args.seeds) if seed not in finished]
+    print(f"{len(finished)} matches already played, {len(tasks)} to play on {args.workers} processes")
+
+    started = time.perf_counter()
+    ticks = 0
+    with Pool(args.workers) as pool, open(args.output, 'a') as output:
+        if output.tell() == 0:
+            output.write(json.dumps({'options': options}) + '\n')
+        for done, result in enumerate(pool.imap_unordered(play_match, tasks, chunksize=args.chunksize), 1):
+            output.write(json.dumps(result) + '\n')
+            output.flush()
+            ticks += result['ticks']
+            if done % 100 == 0 or done == len(tasks):
+                elapsed = time.perf_counter() - started
+                print(f"{done}/{len(tasks)} matches, {done / elapsed:.1f} matches/s, {ticks / elapsed:.0f} ticks/s")
+
+
+if __name__ == '__main__':
+    main()
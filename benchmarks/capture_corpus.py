@@ -0,0 +1,199 @@
+"""
+Regression check of Territory.capture against the former shapely engine on a stored corpus of loops.
+The corpus holds seeded random walks and hand-written self-touching tails, as moves from a starting
+territory, and the cells the shapely engine captured on every loop. The check replays the walks and
+compares the captures cell by cell, the expected cells are applied to the territory so a mismatch
+doesn't change the loops which follow it.
+
+The flood fill also captures pockets which a tail closes by touching itself diagonally, shapely sees
+them outside of the polygon of the loop. Those cells are stored as accepted differences of a capture,
+a cell shapely captures is never allowed to be missing.
+
+Run from the repository root:
+    python -m benchmarks.capture_corpus
+    python -m benchmarks.capture_corpus --record  # rebuild the corpus, needs shapely and networkx
+"""
+import argparse
+import json
+import os
+import random
+
+from benchmarks.loop_closure import networkx_get_voids
+from game_objects.board import Board
+from game_objects.territory import Territory
+from helpers import get_neighboring_points
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'capture_corpus.json')
+MOVES = {'U': (0, -1), 'D': (0, 1), 'L': (-1, 0), 'R': (1, 0)}
+OPPOSITE = {'U': 'D', 'D': 'U', 'L': 'R', 'R': 'L'}
+
+# tails which run along themselves and close pockets with their own cells, as moves from the territory
+# around SELF_TOUCHING_START
+SELF_TOUCHING_WALKS = [
+    # a 2 x 1 pocket closed by the tail coming back along its way out, both engines capture it
+    'UUUUUURRRDDLLDDD',
+    # the tail runs along itself for its whole way back
+    'RRRRRUUUULLLLLLLDDDRRRRRRD',
+    # the tail runs along the territory and itself
+    'ULLLLDDDDRRRRRDRRUUUUULL',
+    # a one cell pocket closed by a diagonal touch of the tail, in every rotation and mirror,
+    # only the flood fill captures it
+    'LLUUUURDRRUULURRRRDDDDDDLLL', 'RRUUUULDLLUURULLLLDDDDDDRRR',
+    'UURRRRDLDDRRURDDDDLLLLLLUUU', 'UULLLLDRDDLLULDDDDRRRRRRUUU',
+    'RRDDDDLULLDDRDLLLLUUUUUURRR', 'LLDDDDRURRDDLDRRRRUUUUUULLL',
+    'DDLLLLURUULLDLUUUURRRRRRDDD', 'DDRRRRULUURRDRUUUULLLLLLDDD',
+]
+SELF_TOUCHING_START = (10, 10)
+
+
+def shapely_capture(territory, line_points):
+    """
+    Territory.capture as it was implemented with shapely: the loop is closed along the boundary with
+    networkx and every cell of its bounding box is tested to be inside of the polygon of the loop
+    """
+    from shapely.geometry import Point, Polygon
+
+    captured = {point for point in line_points if point not in territory.points}
+    # the boundary is found by scanning the territory, as it was before the territory kept it
+    boundary = [point for point in territory.points
+                if any(neighbor not in territory.points for neighbor in get_neighboring_points(point))]
+    loop = networkx_get_voids(territory, line_points, boundary)
+    xs, ys = [x for x, _ in loop], [y for _, y in loop]
+    polygon = Polygon(loop)
+    for x in range(max(xs), min(xs), -1):
+        for y in range(max(ys), min(ys), -1):
+            if (x, y) not in territory.points and polygon.contains(Point(x, y)):
+                captured.add((x, y))
+    return captured
+
+
+def engine_capture(territory, line_points):
+    return set(territory.capture(line_points))
+
+
+def replay(walk, size, capture, expected=None):
+    """
+    Move a head the way the scene does: a line is drawn outside of the territory and is captured
+    as soon as it comes back, the walk ends when the head leaves the board or crosses its line
+    :param walk: starting point and moves
+    :param capture: function of the territory and the line which returns the captured cells
+    :param expected: cells to apply on every capture instead of the captured ones
+    :return: cells captured on every capture, as the function returned them
+    """
+    board = Board(*size)
+    x, y = walk['start']
+    territory = Territory(x, y, None, board)
+    line = []
+    results = []
+    for move in walk['moves']:
+        dx, dy = MOVES[move]
+        x, y = x + dx, y + dy
+        if not board.in_bounds((x, y)) or (x, y) in line:
+            break
+        if (x, y) not in territory.points or line:
+            line.append((x, y))
+        if len(line) > 1 and (x, y) in territory.points:
+            captured = capture(territory, list(line))
+            results.append(captured)
+            captured = expected[len(results) - 1] if expected is not None else captured
+            if captured:
+                territory.points.update(captured)
+                line.clear()
+    return results
+
+
+def random_walk(rng, size, steps, turn_chance=0.3):
+    start = (rng.randrange(2, size[0] - 2), rng.randrange(2, size[1] - 2))
+    moves = [rng.choice('UDLR')]
+    for _ in range(steps - 1):
+        turns = [move for move in 'UDLR' if move not in (moves[-1], OPPOSITE[moves[-1]])]
+        moves.append(rng.choice(turns) if rng.random() < turn_chance else moves[-1])
+    return {'start': start, 'moves': ''.join(moves)}
+
+
+def record(walks_count, size, steps, seed):
+    """
+    Replay the walks with both engines and store the walks which capture anything
+    :return: the corpus
+    """
+    rng = random.Random(seed)
+    walks = [{'start': SELF_TOUCHING_START, 'moves': moves, 'note': 'self-touching'}
+             for moves in SELF_TOUCHING_WALKS]
+    walks += [random_walk(rng, size, steps) for _ in range(walks_count)]
+    corpus = {'size': size, 'walks': []}
+    for walk in walks:
+        expected, fill_only = [], []
+
+        def capture(territory, line_points):
+            cells = shapely_capture(territory, line_points)
+            captured = engine_capture(territory, line_points)
+            if not cells <= captured:
+                raise ValueError(f"{walk}: the flood fill misses {sorted(cells - captured)}")
+            if captured - cells:
+                fill_only.append([len(expected), sorted(captured - cells)])
+            expected.append(sorted(cells))
+            return captured
+
+        if replay(walk, size, capture):
+            walk.update(captures=expected, fill_only=fill_only)
+            corpus['walks'].append(walk)
+    with open(CORPUS_PATH, 'w') as f:
+        json.dump(corpus, f, separators=(',', ':'))
+    return corpus
+
+
+def get_expected(walk):
+    """
+    :return: cells the flood fill should capture on every capture of the walk
+    """
+    expected = [set(map(tuple, cells)) for cells in walk['captures']]
+    for index, cells in walk['fill_only']:
+        expected[index].update(map(tuple, cells))
+    return expected
+
+
+def check(corpus):
+    """
+    :return: number of captures, number of accepted differences and descriptions of the captures
+             which differ from the corpus
+    """
+    size = tuple(corpus['size'])
+    captures, accepted, mismatches = 0, 0, []
+    for i, walk in enumerate(corpus['walks']):
+        expected = get_expected(walk)
+        results = replay(walk, size, engine_capture, expected)
+        if len(results) != len(expected):
+            mismatches.append(f"walk {i}: {len(results)} captures instead of {len(expected)}")
+        for j, (captured, cells) in enumerate(zip(results, expected)):
+            captures += 1
+            if captured != cells:
+                mismatches.append(f"walk {i} ({walk.get('note', 'random')}) capture {j}: "
+                                  f"missing {sorted(cells - captured)}, extra {sorted(captured - cells)}")
+        accepted += len(walk['fill_only'])
+    return captures, accepted, mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--record', action='store_true', help='rebuild the corpus with the shapely engine')
+    parser.add_argument('--walks', type=int, default=2000, help='random walks of a rebuilt corpus')
+    parser.add_argument('--steps', type=int, default=120, help='moves of every random walk')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.record:
+        corpus = record(args.walks, (40, 40), args.steps, args.seed)
+    else:
+        with open(CORPUS_PATH) as f:
+            corpus = json.load(f)
+    captures, accepted, mismatches = check(corpus)
+    print(f"{len(corpus['walks'])} walks, {captures} captures, {accepted} accepted differences "
+          f"from the shapely engine, {len(mismatches)} mismatches")
+    for mismatch in mismatches:
+        print(mismatch)
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
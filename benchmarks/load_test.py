@@ -0,0 +1,135 @@
+"""
+Load test of the game server: hundreds of simulated clients on one event loop, each reads every state
+and delta and turns its player now and then. Slow clients connect but never read, the server must keep
+its tick rate and the other clients their updates anyway.
+
+Run from the repository root:
+    python -m benchmarks.load_test --connections 300 --slow 20 --spawn-server
+    python -m benchmarks.load_test --host 127.0.0.1 --port 8765 --connections 300
+"""
+import argparse
+import asyncio
+import random
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from config import CONSTS
+from game_objects.bots import DIRECTIONS
+from game_objects.protocol import STATE, decode_welcome, encode_client_command, frame, get_tick, read_message
+
+
+class ClientStats:
+    def __init__(self):
+        self.states = 0  # whole states and deltas
+        self.full_states = 0
+        self.bytes = 0
+        self.missed = 0  # ticks of the server the client got no state of
+        self.last_tick = None
+        self.max_gap = 0.0  # longest wait for a state in seconds
+        self.last_time = None
+
+    def record(self, tick, size, now, full):
+        if self.last_tick is not None and tick > self.last_tick:
+            self.missed += tick - self.last_tick - 1  # a lower tick is the first one of a new match
+        if self.last_time is not None:
+            self.max_gap = max(self.max_gap, now - self.last_time)
+        self.states += 1
+        self.full_states += full
+        self.bytes += size
+        self.last_tick, self.last_time = tick, now
+
+
+async def simulated_client(host, port, stats, rng, turn_chance, slow=False):
+    """
+    :param stats: ClientStats to record the received states to
+    :param turn_chance: chance of sending a random direction after a state
+    :param slow: connect and never read, as a client which can't keep up does
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        player_id, _, _ = decode_welcome(await read_message(reader))
+        if slow:
+            await asyncio.Event().wait()
+        while True:
+            payload = await read_message(reader)
+            stats.record(get_tick(payload), len(payload), time.perf_counter(), payload[:1] == STATE)
+            if player_id and rng.random() < turn_chance:
+                writer.write(frame(encode_client_command(rng.choice(DIRECTIONS), None)))
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, connections, slow, seconds, turn_chance=0.1, seed=0):
+    """
+    :return: stats of the normal clients and the number of connections that failed
+    """
+    rng = random.Random(seed)
+    stats = [ClientStats() for _ in range(connections)]
+    tasks = [asyncio.create_task(simulated_client(host, port, stats[i], random.Random(rng.getrandbits(64)),
+                                                  turn_chance, slow=i < slow))
+             for i in range(connections)]
+    await asyncio.sleep(seconds)
+    failed = sum(task.done() and task.exception() is not None for task in tasks)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return stats[slow:], failed
+
+
+def wait_for_server(host, port, timeout=10.0):
+    async def connect():
+        deadline = time.perf_counter() + timeout
+        while True:
+            try:
+                _, writer = await asyncio.open_connection(host, port)
+                writer.close()
+                return
+            except OSError:
+                if time.perf_counter() > deadline:
+                    raise
+                await asyncio.sleep(0.1)
+
+    asyncio.run(connect())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=CONSTS.SERVER_PORT)
+    parser.add_argument('--connections', type=int, default=200)
+    parser.add_argument('--slow', type=int, default=0, help='connections out of them which never read')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--spawn-server', action='store_true', help='start server.py for the test')
+    parser.add_argument('--players', type=int, default=8, help='players of the spawned server')
+    args = parser.parse_args()
+    if not 0 <= args.slow < args.connections:
+        parser.error("--slow must leave at least one normal connection")
+
+    server = None
+    if args.spawn_server:
+        server = subprocess.Popen([sys.executable, 'server.py', '--host', args.host, '--port', str(args.port),
+                                   '--players', str(args.players), '--stats', str(args.seconds / 2)])
+    try:
+        wait_for_server(args.host, args.port)
+        stats, failed = asyncio.run(run_load(args.host, args.port, args.connections, args.slow, args.seconds))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    rates = np.array([client.states / args.seconds for client in stats])
+    missed = np.array([client.missed for client in stats])
+    gaps = np.array([client.max_gap for client in stats]) * 1000
+    print(f"{args.connections} connections ({args.slow} slow, {failed} failed) for {args.seconds:g} s")
+    print(f"states per client: {rates.mean():.1f}/s (min {rates.min():.1f}/s), "
+          f"missed ticks: {missed.mean():.1f} (max {missed.max()}), longest wait: {gaps.max():.0f} ms")
+    states = sum(client.states for client in stats)
+    print(f"received {sum(client.bytes for client in stats) / args.seconds / 2 ** 20:.2f} MiB/s in total, "
+          f"{sum(client.full_states for client in stats) / max(states, 1):.1%} of the updates are whole states")
+
+
+if __name__ == '__main__':
+    main()
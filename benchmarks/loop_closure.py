@@ -0,0 +1,86 @@
+"""
+Micro-benchmark of closing a capture loop along the territory boundary:
+the breadth-first search of Territory.get_voids against the former networkx implementation.
+
+Run from the repository root: python -m benchmarks.loop_closure
+"""
+import argparse
+import timeit
+
+from game_objects.board import Board
+from game_objects.territory import Territory
+from helpers import get_neighboring_points
+
+
+def networkx_get_voids(territory, line_points, boundary=None):
+    """
+    Territory.get_voids as it was implemented on top of networkx
+    :param boundary: boundary points of the territory, the ones the territory keeps if None
+    """
+    import networkx as nx
+
+    if boundary is None:
+        boundary = territory.get_boundary()
+
+    def get_boundary_siblings(point):
+        return [sibling for sibling in get_neighboring_points(point) if sibling in boundary]
+
+    graph = nx.Graph()
+    for index, point in enumerate(boundary):
+        for sibling in get_boundary_siblings(point):
+            graph.add_edge(index, boundary.index(sibling), weight=1)
+
+    end_index = boundary.index(line_points[-1])
+    start_index = boundary.index(get_boundary_siblings(line_points[0])[0])
+    try:
+        path = nx.shortest_path(graph, end_index, start_index, weight='weight')
+    except (nx.NetworkXNoPath, nx.NodeNotFound):
+        path = []
+    return line_points + [boundary[index] for index in path]
+
+
+def make_scenario(side):
+    """
+    Square territory of side x side cells and a tail which runs along its right edge
+    from the top corner and enters the territory at the bottom corner
+    """
+    board = Board(side + 4, side + 4)
+    territory = Territory(2, 2, None, board)
+    territory.points.update([(x, y) for x in range(2, side + 2) for y in range(2, side + 2)])
+    line_points = [(side + 2, y) for y in range(2, side + 2)] + [(side + 1, side + 1)]
+    return territory, line_points
+
+
+def measure(func, *args):
+    timer = timeit.Timer(lambda: func(*args))
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=3, number=number)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sides', type=int, nargs='+', default=[25, 50, 100, 200],
+                        help='sides of the square territories')
+    args = parser.parse_args()
+
+    try:
+        import networkx  # noqa: F401
+        has_networkx = True
+    except ImportError:
+        has_networkx = False
+        print('networkx is not installed, only the breadth-first search is measured')
+
+    print(f"{'side':>6} {'boundary':>9} {'bfs, ms':>10} {'networkx, ms':>13} {'speedup':>8}")
+    for side in args.sides:
+        territory, line_points = make_scenario(side)
+        bfs = measure(territory.get_voids, line_points)
+        row = f"{side:>6} {len(territory.boundary):>9} {bfs * 1000:>10.3f}"
+        if has_networkx:
+            assert len(networkx_get_voids(territory, line_points)) == len(territory.get_voids(line_points))
+            legacy = measure(networkx_get_voids, territory, line_points)
+            row += f" {legacy * 1000:>13.3f} {legacy / bfs:>7.1f}x"
+        print(row)
+
+
+if __name__ == '__main__':
+    main()
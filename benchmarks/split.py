@@ -0,0 +1,47 @@
+"""
+Micro-benchmark of Territory.split: a corner of a square territory is cut off, the owner's head
+is in the large part. The time should depend on the size of the corner, not of the territory.
+
+Run from the repository root: python -m benchmarks.split
+"""
+import argparse
+import timeit
+
+from game_objects.board import Board
+from game_objects.territory import Territory
+
+
+def make_scenario(side, corner):
+    """
+    Square territory of side x side cells and an L-shaped cut which separates a corner x corner square
+    """
+    board = Board(side, side)
+    territory = Territory(1, 1, None, board)
+    territory.points.update([(x, y) for x in range(side) for y in range(side)])
+    cut = [(x, corner) for x in range(corner + 1)] + [(corner, y) for y in range(corner)]
+    return territory, cut, (side // 2, side // 2)
+
+
+def measure(side, corner):
+    # every run needs a whole territory, so it is rebuilt outside of the timed part
+    timer = timeit.Timer('territory.split(cut, anchor)', setup='territory, cut, anchor = make_scenario(side, corner)',
+                         globals={'make_scenario': make_scenario, 'side': side, 'corner': corner})
+    return min(timer.repeat(repeat=5, number=1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sides', type=int, nargs='+', default=[50, 100, 200, 400],
+                        help='sides of the square territories')
+    parser.add_argument('--corner', type=int, default=10, help='side of the corner which is cut off')
+    args = parser.parse_args()
+
+    print(f"{'side':>6} {'area':>8} {'released':>9} {'split, ms':>10}")
+    for side in args.sides:
+        territory, cut, anchor = make_scenario(side, args.corner)
+        released = len(territory.split(cut, anchor))
+        print(f"{side:>6} {side * side:>8} {released:>9} {measure(side, args.corner) * 1000:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+"""
+Benchmark suite of the simulation and rendering hot paths. Every scenario is seeded,
+so runs of different commits play the same matches. Rendering uses a dummy video driver.
+
+Run from the repository root:
+    python -m benchmarks.suite --output before.json
+    python -m benchmarks.suite --output after.json --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+from contextlib import contextmanager
+from itertools import count, cycle
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import numpy as np
+import pygame
+
+from config import CONSTS
+from headless import random_inputs
+from game_objects.scene import GameScene
+from game_objects.territory import Territory
+
+PERCENTILES = [50, 90, 99]
+
+
+def summarize(samples):
+    """
+    :param samples: durations in seconds
+    :return: statistics of the durations in milliseconds
+    """
+    if not samples:
+        return {'n': 0}
+    ms = np.array(samples) * 1000
+    stats = {'n': len(samples), 'mean': float(ms.mean()), 'max': float(ms.max())}
+    for percentile in PERCENTILES:
+        stats[f'p{percentile}'] = float(np.percentile(ms, percentile))
+    return stats
+
+
+@contextmanager
+def timed(owner, name, samples, only_if=None):
+    """
+    Temporarily wrap owner.name to record the duration of every call
+    :param only_if: predicate of the call result, the duration is recorded only if it is true
+    """
+    original = owner.__dict__[name]
+    func = original.__func__ if isinstance(original, staticmethod) else original
+
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        result = func(*args, **kwargs)
+        if only_if is None or only_if(result):
+            samples.append(time.perf_counter() - started)
+        return result
+
+    setattr(owner, name, staticmethod(wrapper) if isinstance(original, staticmethod) else wrapper)
+    try:
+        yield
+    finally:
+        setattr(owner, name, original)
+
+
+def respawn(scene, player, x, y):
+    """
+    Move the player to a new territory around (x, y)
+    """
+    player.territory.points.clear()
+    player.x = player.prev_x = x
+    player.y = player.prev_y = y
+    player.line_points.clear()
+    player.territory = Territory(x, y, player.territory_color, scene.board, player.id)
+
+
+def leg_inputs(legs):
+    """
+    Inputs of players which walk straight legs one after another
+    :param legs: {player id: iterator of (direction, number of cells) legs}
+    """
+    state = {player_id: {'position': None, 'left': 0} for player_id in legs}
+
+    def inputs(scene):
+        commands = {}
+        for player in scene.players:
+            walk = state.get(player.id)
+            if walk is None:
+                continue
+            if player.get_position() != walk['position']:
+                walk['position'] = player.get_position()
+                walk['left'] -= 1
+            if walk['left'] <= 0:
+                direction, walk['left'] = next(legs[player.id])
+                commands[player.id] = (direction, None)
+        return commands
+    return inputs
+
+
+def spiral_legs():
+    """
+    Spiral outwards which never comes back, growing a long tail
+    """
+    return ((['up', 'right', 'down', 'left'][leg % 4], leg // 2 + 1) for leg in count())
+
+
+def loop_legs(outwards, along, inwards):
+    """
+    Loops out of the territory and back, capturing a rectangle every time
+    """
+    return cycle([(outwards, 6), (along, 6), (inwards, 6), (along, 2)])
+
+
+def small_territories(seed):
+    scene = GameScene(None, game_mode='timeLIMIT')
+    return scene, random_inputs(random.Random(seed))
+
+
+def huge_territory(seed):
+    scene = GameScene(None, game_mode='timeLIMIT', players_count=2, width=200, height=200)
+    first, second = scene.players
+    respawn(scene, second, 5, 190)
+    respawn(scene, first, 20, 109)
+    first.territory.add_points([(x, y) for x in range(10, 190) for y in range(10, 110)])
+    return scene, leg_inputs({first.id: loop_legs('down', 'right', 'up')})
+
+
+def long_tails(seed):
+    scene = GameScene(None, game_mode='timeLIMIT', players_count=4, width=300, height=300)
+    for i, player in enumerate(scene.players):
+        respawn(scene, player, 75 + 150 * (i % 2), 75 + 150 * (i // 2))
+    return scene, leg_inputs({player.id: spiral_legs() for player in scene.players})
+
+
+def many_players(seed):
+    scene = GameScene(None, game_mode='timeLIMIT', players_count=64, width=300, height=300)
+    return scene, random_inputs(random.Random(seed))
+
+
+def full_board(seed):
+    scene = GameScene(None, game_mode='timeLIMIT', players_count=4, width=200, height=200)
+    legs = {}
+    for i, player in enumerate(scene.players):
+        # players of the left quadrants loop into the right ones and vice versa, capturing enemy cells
+        x0, y0 = 100 * (i % 2), 100 * (i // 2)
+        if i % 2 == 0:
+            respawn(scene, player, x0 + 99, y0 + 10)
+            legs[player.id] = loop_legs('right', 'down', 'left')
+        else:
+            respawn(scene, player, x0, y0 + 50)
+            legs[player.id] = loop_legs('left', 'down', 'right')
+        # a band across the middle of the board is left free for respawns and bonuses
+        player.territory.add_points([(x, y) for x in range(x0, x0 + 100) for y in range(y0, y0 + 100)
+                                     if not 95 <= y < 105])
+    return scene, leg_inputs(legs)
+
+
+SCENARIOS = {
+    'small_territories': small_territories,
+    'huge_territory': huge_territory,
+    'long_tails': long_tails,
+    'many_players': many_players,
+    'full_board': full_board,
+}
+
+
+def run_simulation(scenario, ticks, seed):
+    """
+    :return: statistics of ticks, captures, loser detection and collision resolution
+    """
+    random.seed(seed)
+    scene, inputs = SCENARIOS[scenario](seed)
+    scene.max_ticks = None
+
+    samples = {'tick': [], 'capture': [], 'is_player_lose': [], 'collision_resolution': []}
+    with timed(Territory, 'capture', samples['capture'], only_if=len), \
+            timed(GameScene, 'is_player_lose', samples['is_player_lose']), \
+            timed(GameScene, 'collision_resolution', samples['collision_resolution']):
+        for _ in range(ticks):
+            if scene.next_scene is not scene:
+                break
+            scene.apply_commands(inputs(scene))
+            started = time.perf_counter()
+            scene.update()
+            samples['tick'].append(time.perf_counter() - started)
+    return {name: summarize(durations) for name, durations in samples.items()}
+
+
+def run_rendering(renderer, frames, seed):
+    """
+    :return: statistics of incremental frames and full repaints of the default board
+    """
+    pygame.display.init()
+    screen = pygame.display.set_mode((CONSTS.WINDOW_WIDTH, CONSTS.WINDOW_HEIGHT))
+    random.seed(seed)
+    scene = GameScene(screen, game_mode='timeLIMIT', renderer=renderer)
+    inputs = random_inputs(random.Random(seed))
+
+    samples = {'frame': [], 'full_frame': []}
+    for frame in range(frames):
+        if scene.next_scene is not scene:
+            break
+        scene.apply_commands(inputs(scene))
+        scene.update()
+        full = frame % 10 == 0
+        if full:
+            scene.invalidate()
+            screen.fill(CONSTS.WHITE)
+        started = time.perf_counter()
+        scene.render()
+        samples['full_frame' if full else 'frame'].append(time.perf_counter() - started)
+    pygame.display.quit()
+    return {name: summarize(durations) for name, durations in samples.items()}
+
+
+def get_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def print_results(results, baseline=None):
+    print(f"{'benchmark':<42} {'n':>6} {'mean, ms':>10} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}"
+          + (f" {'p50 vs baseline':>16}" if baseline else ''))
+    for case, metrics in results.items():
+        for metric, stats in metrics.items():
+            if stats['n'] == 0:
+                continue
+            row = f"{case + '.' + metric:<42} {stats['n']:>6} {stats['mean']:>10.3f}" + \
+                  ''.join(f" {stats[key]:>9.3f}" for key in ['p50', 'p90', 'p99', 'max'])
+            old = (baseline or {}).get(case, {}).get(metric, {})
+            if old.get('n'):
+                row += f" {stats['p50'] / old['p50']:>15.2f}x"
+            print(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--renderers', nargs='*', choices=['cells', 'surface'], default=['cells', 'surface'])
+    parser.add_argument('--ticks', type=int, default=300, help='ticks simulated in every scenario')
+    parser.add_argument('--frames', type=int, default=CONSTS.MAX_TICK_COUNT,
+                        help='frames rendered by every renderer, at most a time limited match long')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='JSON file to save the results to')
+    parser.add_argument('--compare', help='JSON file of a previous run to compare the results with')
+    args = parser.parse_args()
+
+    results = {}
+    for scenario in args.scenarios:
+        results[scenario] = run_simulation(scenario, args.ticks, args.seed)
+    for renderer in args.renderers:
+        results[f'render_{renderer}'] = run_rendering(renderer, args.frames, args.seed)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)['results']
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({
+                'commit': get_commit(),
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'ticks': args.ticks,
+                'frames': args.frames,
+                'seed': args.seed,
+                'results': results,
+            }, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Thin client of the game server: sends the arrow keys and M (nitro) as commands of its player and draws
+the state the server keeps it up to date with, it doesn't simulate anything itself.
+
+python server.py &
+python client.py --host 127.0.0.1 --port 8765
+"""
+import argparse
+import asyncio
+
+import numpy as np
+import pygame
+
+from config import CONSTS
+from game_objects.board_surface import PixelBoardRenderer
+from game_objects.player import get_head_and_line_colors
+from game_objects.protocol import (DELTA, STATE, decode_state, decode_welcome, encode_client_command, frame,
+                                   read_message)
+from game_objects.snapshot import BONUS_TYPES
+from helpers import render_text
+
+KEYS = {CONSTS.UP: 'up', CONSTS.DOWN: 'down', CONSTS.LEFT: 'left', CONSTS.RIGHT: 'right'}
+
+
+def get_player_color(player_id):
+    return CONSTS.PLAYER_COLORS[(player_id - 1) % len(CONSTS.PLAYER_COLORS)]
+
+
+class StateRenderer(PixelBoardRenderer):
+    """
+    Draws received states the way BoardSurface draws the board of a scene
+    """
+
+    def __init__(self, screen, width, height, player_id, rect=(0, 0, CONSTS.GRID_WIDTH, CONSTS.GRID_HEIGHT)):
+        """
+        :param player_id: player of the client, 0 for a spectator
+        """
+        super().__init__(screen, width, height, rect)
+        self.player_id = player_id
+        self.palette[1:] = [get_player_color(player_id)[:3] for player_id in range(1, len(self.palette))]
+
+    def draw(self, state):
+        lines, heads = [], []
+        for player_id, x, y, alive, _, _ in state.players.tolist():
+            if not alive:
+                continue
+            head_color, line_color = get_head_and_line_colors(get_player_color(player_id))
+            line = state.lines.get(player_id)
+            if line:
+                lines.append((line_color, *np.array(list(line)).T))
+            if 0 <= x < self.width and 0 <= y < self.height:
+                heads.append((head_color, x, y))
+        bonuses = [(BONUS_TYPES[bonus_type], x, y) for x, y, bonus_type in state.bonuses]
+
+        self.screen.fill(CONSTS.WHITE)
+        self._draw(state.owners, lines, heads, bonuses)
+        self.__draw_scores(state)
+
+    def __draw_scores(self, state):
+        x, y = self.rect.right + 10, 10
+        self.screen.blit(render_text(f"tick {state.tick}", 24, CONSTS.BLACK), (x, y))
+        for player_id, _, _, alive, _, score in sorted(state.players.tolist(), key=lambda row: -row[5]):
+            y += 24
+            name = 'you' if player_id == self.player_id else f'player{player_id}'
+            color = get_player_color(player_id) if alive else CONSTS.GREY
+            self.screen.blit(render_text(f"{name}: {score / 10:g}", 24, color), (x, y))
+
+
+async def receive_states(reader, latest):
+    """
+    Keep latest['state'] up to date with the states and the deltas of the server, the ticks which
+    came in between frames are never drawn
+    """
+    while True:
+        payload = await read_message(reader)
+        if payload[:1] == STATE:
+            latest['state'] = decode_state(payload)
+        elif payload[:1] == DELTA and latest['state'] is not None:
+            latest['state'].apply_delta(payload)
+
+
+async def play(host, port, fps=CONSTS.FPS):
+    reader, writer = await asyncio.open_connection(host, port)
+    player_id, width, height = decode_welcome(await read_message(reader))
+
+    pygame.init()
+    pygame.display.set_caption(f"Grab The Map - {'player' + str(player_id) if player_id else 'spectator'}")
+    screen = pygame.display.set_mode((CONSTS.WINDOW_WIDTH, CONSTS.WINDOW_HEIGHT))
+    renderer = StateRenderer(screen, width, height, player_id)
+    latest = {'state': None}
+    receiving = asyncio.create_task(receive_states(reader, latest))
+
+    drawn_tick = None
+    try:
+        while not receiving.done():
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    return
+                command = None
+                if event.type == pygame.KEYDOWN and event.key in KEYS:
+                    command = (KEYS[event.key], None)
+                elif event.type in (pygame.KEYDOWN, pygame.KEYUP) and event.key == CONSTS.NITRO1:
+                    command = (None, event.type == pygame.KEYDOWN)
+                if command is not None and player_id:
+                    writer.write(frame(encode_client_command(*command)))
+
+            state = latest['state']
+            if state is not None and state.tick != drawn_tick:
+                renderer.draw(state)
+                pygame.display.flip()
+                drawn_tick = state.tick
+            await asyncio.sleep(1 / fps)
+        receiving.result()  # the connection is closed, raise what closed it
+    finally:
+        receiving.cancel()
+        writer.close()
+        pygame.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=CONSTS.SERVER_PORT)
+    args = parser.parse_args()
+    try:
+        asyncio.run(play(args.host, args.port))
+    except (asyncio.IncompleteReadError, ConnectionError):
+        print("the server closed the connection")
+
+
+if __name__ == '__main__':
+    main()
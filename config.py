@@ -4,7 +4,9 @@ import pygame
 
 
 class CONSTS:
-    FPS = 20  # частота кадров в секунду
+    FPS = 60  # частота кадров в секунду
+    TICKS_PER_SECOND = 20  # game speed, doesn't depend on the frame rate
+    MAX_CATCH_UP_TICKS = 10  # ticks run at most to catch up after a stall, the rest of the stall is skipped
     LINE_KILL_SCORE = 10
     MAX_TICK_COUNT = 200
 
@@ -47,6 +49,7 @@ class CONSTS:
     GRID_WIDTH = X_CELLS_COUNT * WIDTH
     WINDOW_HEIGHT = GRID_HEIGHT
     WINDOW_WIDTH = GRID_WIDTH + 10 * WIDTH
+    BOARD_CHUNK_SIZE = 64  # cells of the board are stored in square chunks of that many cells a side
 
     PLAYER_COLORS = [
         (90, 159, 153, 255),
@@ -57,12 +60,22 @@ class CONSTS:
         (141, 110, 99, 255)
     ]
 
+    RENDERER = 'cells'  # 'cells' - a surface per cell, 'surface' - the whole board from a pixel array
+
     EMPTY_CELL_COLOR = (220, 240, 244, 255)
     GRID_LINE_COLOR = (144, 163, 174, 64)
 
-    IMAGES = {
-        'flash': pygame.image.load("../sprites/flash.png")
-    }
+    PROFILER_TICKS = 300  # ticks kept by the tick profiler
+    HUD_TICKS = 60  # ticks shown by the profiler overlay
+    TEXT_CACHE_SIZE = 256  # rendered text surfaces kept for reuse
+    PROFILER_OVERLAY = pygame.K_F3
+    PROFILER_DUMP = pygame.K_F4
+
+    SPAWN_HEAD_DISTANCE = 4  # players and bonuses don't appear closer to a head than that
+    BOT_VIEW_RADIUS = 5  # bots see that many cells around the head in every direction
+
+    SERVER_PORT = 8765
+    SERVER_BUFFER_LIMIT = 1 << 18  # bytes queued for a client above which the server drops its states
 
     AVAILABLE_BONUSES = ['nitro', 'extra_life']
     BONUS_CHANCE = 1
@@ -0,0 +1,339 @@
+import numpy as np
+
+from config import CONSTS
+from game_objects.free_cells import FreeCells
+from helpers import get_spawn_region
+
+# offsets of a cell and its vertical, horizontal and diagonal neighbours
+NEIGHBOURHOOD_DX, NEIGHBOURHOOD_DY = (a.ravel() for a in np.meshgrid([-1, 0, 1], [-1, 0, 1]))
+
+
+class Board:
+    """
+    Ownership grid shared by all players: one owner id per cell, 0 for a free cell.
+    Cells are stored in square chunks, indexed as chunk[x, y]. A chunk is allocated when
+    one of its cells is taken and dropped when all of them are free again, so the parts
+    of the board nobody has touched cost nothing.
+    """
+    FREE = 0
+
+    def __init__(self, width=CONSTS.X_CELLS_COUNT, height=CONSTS.Y_CELLS_COUNT, chunk_size=CONSTS.BOARD_CHUNK_SIZE):
+        self.width = width
+        self.height = height
+        self.chunk_size = chunk_size
+        self.chunk_rows = -(-height // chunk_size)  # number of chunks in a column of the board
+        # owners of the cells of every allocated chunk, by chunk id (chunk x * chunk rows + chunk y)
+        self.chunks = {}
+        # number of cells of every owner, indexed by owner id
+        self.areas = np.zeros(np.iinfo(np.uint8).max + 1, dtype=np.int64)
+        self.areas[self.FREE] = self.size
+        # cells of every owner with at least one neighbour (diagonal included) of another owner
+        self.boundaries = {}
+        # number of cells of every owner in every chunk: owner -> {chunk id: count}, free cells aren't counted
+        self.owner_chunks = {}
+        # owners of the lines which go through a point: point -> players, kept up to date by the lines
+        self.lines = {}
+        # free cells where players and bonuses can appear
+        self.spawn_cells = FreeCells(self, get_spawn_region(width, height))
+        # TickDelta the changes of the cells and the lines are recorded to, None when nobody collects them
+        self.delta = None
+
+    @property
+    def size(self):
+        return self.width * self.height
+
+    @property
+    def owned_count(self):
+        """
+        Number of cells owned by anybody, kept up to date by every write
+        """
+        return self.size - int(self.areas[self.FREE])
+
+    def is_full(self):
+        return self.areas[self.FREE] == 0
+
+    def in_bounds(self, point):
+        x, y = point
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def indices(self, points):
+        """
+        :param points: iterable of (x, y) points
+        :return: unique x and y indices of the points which lie on the board
+        """
+        cells = np.array(points if isinstance(points, np.ndarray) else list(points), dtype=np.intp).reshape(-1, 2)
+        return self._unique(cells[:, 0], cells[:, 1])
+
+    def _unique(self, xs, ys):
+        inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        linear = np.unique(xs[inside] * self.height + ys[inside])
+        return np.divmod(linear, self.height)
+
+    @staticmethod
+    def _to_points(xs, ys):
+        return list(zip(xs.tolist(), ys.tolist()))
+
+    def chunk_ids(self, xs, ys):
+        """
+        :return: ids of the chunks of the cells
+        """
+        return xs // self.chunk_size * self.chunk_rows + ys // self.chunk_size
+
+    def chunk_origin(self, chunk_id):
+        """
+        :return: x and y of the top left cell of the chunk
+        """
+        chunk_x, chunk_y = divmod(chunk_id, self.chunk_rows)
+        return chunk_x * self.chunk_size, chunk_y * self.chunk_size
+
+    def owner_of(self, point):
+        """
+        :return: id of the cell owner, Board.FREE for a free or off-board cell
+        """
+        if not self.in_bounds(point):
+            return self.FREE
+        x, y = point
+        chunk = self.chunks.get(x // self.chunk_size * self.chunk_rows + y // self.chunk_size)
+        if chunk is None:
+            return self.FREE
+        return int(chunk[x % self.chunk_size, y % self.chunk_size])
+
+    def owners_at(self, xs, ys):
+        """
+        :param xs, ys: arrays of x and y indices of cells, repeated and off-board cells are allowed
+        :return: owners of the cells, Board.FREE for free and off-board cells
+        """
+        owners = np.zeros(xs.shape, dtype=np.uint8)
+        inside = np.flatnonzero((xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height))
+        if inside.size == 0:
+            return owners
+        xs, ys = xs.ravel()[inside], ys.ravel()[inside]
+        # the touched chunks are stacked to read all the cells at once, places of the chunks in the stack
+        # are looked up in a table over all chunk ids which is cheaper than sorting the cells
+        chunk_ids = self.chunk_ids(xs, ys)
+        places = np.zeros(-(-self.width // self.chunk_size) * self.chunk_rows, dtype=np.intp)
+        places[chunk_ids] = 1
+        touched = np.flatnonzero(places)
+        places[touched] = np.arange(touched.size)
+        free = np.zeros((self.chunk_size, self.chunk_size), dtype=np.uint8)
+        stack = np.stack([self.chunks.get(chunk_id, free) for chunk_id in touched.tolist()])
+        owners.reshape(-1)[inside] = stack[places[chunk_ids], xs % self.chunk_size, ys % self.chunk_size]
+        return owners
+
+    def area(self, owner):
+        return int(self.areas[owner])
+
+    def get_window(self, x_min, y_min, x_max, y_max):
+        """
+        :return: owners of the cells of a rectangle, the maximums included, indexed [x - x_min, y - y_min].
+                 Cells out of the board are free.
+        """
+        window = np.zeros((x_max - x_min + 1, y_max - y_min + 1), dtype=np.uint8)
+        size = self.chunk_size
+        for chunk_x in range(max(x_min, 0) // size, min(x_max, self.width - 1) // size + 1):
+            for chunk_y in range(max(y_min, 0) // size, min(y_max, self.height - 1) // size + 1):
+                chunk = self.chunks.get(chunk_x * self.chunk_rows + chunk_y)
+                if chunk is None:
+                    continue
+                left, top = chunk_x * size, chunk_y * size
+                x0, y0 = max(x_min, left), max(y_min, top)
+                x1, y1 = min(x_max, left + size - 1), min(y_max, top + size - 1)
+                window[x0 - x_min:x1 - x_min + 1, y0 - y_min:y1 - y_min + 1] = \
+                    chunk[x0 - left:x1 - left + 1, y0 - top:y1 - top + 1]
+        return window
+
+    def get_owners(self):
+        """
+        :return: owners of all cells as a single array indexed [x, y]
+        """
+        return self.get_window(0, 0, self.width - 1, self.height - 1)
+
+    def get_indices(self, owner):
+        """
+        :return: x and y indices of the owner's cells, sorted by x and then by y
+        """
+        if owner == self.FREE:
+            return np.nonzero(self.get_owners() == owner)
+        xs, ys = [np.empty(0, dtype=np.intp)], [np.empty(0, dtype=np.intp)]
+        for chunk_id in self.owner_chunks.get(owner, ()):
+            left, top = self.chunk_origin(chunk_id)
+            chunk_xs, chunk_ys = np.nonzero(self.chunks[chunk_id] == owner)
+            xs.append(chunk_xs + left)
+            ys.append(chunk_ys + top)
+        linear = np.concatenate(xs) * self.height + np.concatenate(ys)
+        linear.sort()
+        return np.divmod(linear, self.height)
+
+    def get_points(self, owner):
+        return self._to_points(*self.get_indices(owner))
+
+    def get_boundary(self, owner):
+        """
+        :return: live set of the owner's boundary points, must not be modified
+        """
+        return self.boundaries.setdefault(owner, set())
+
+    @staticmethod
+    def _is_edge(window, xs, ys):
+        own = window[xs, ys]
+        edge = np.zeros(xs.shape, dtype=bool)
+        for dx, dy in zip(NEIGHBOURHOOD_DX, NEIGHBOURHOOD_DY):
+            edge |= window[xs + dx, ys + dy] != own
+        return edge
+
+    @staticmethod
+    def _group(chunk_ids):
+        """
+        :return: pairs of a chunk id and indices of the cells in that chunk
+        """
+        if (chunk_ids == chunk_ids[0]).all():
+            return [(int(chunk_ids[0]), slice(None))]
+        order = np.argsort(chunk_ids, kind='stable')
+        ids, starts = np.unique(chunk_ids[order], return_index=True)
+        return zip(ids.tolist(), np.split(order, starts[1:]))
+
+    def _store(self, xs, ys, chunk_ids, owner):
+        """
+        Set the owner of the cells in the chunks, allocating and dropping chunks as needed
+        """
+        for chunk_id, cells in self._group(chunk_ids):
+            chunk = self.chunks.get(chunk_id)
+            if chunk is None:
+                chunk = self.chunks[chunk_id] = np.zeros((self.chunk_size, self.chunk_size), dtype=np.uint8)
+            left, top = self.chunk_origin(chunk_id)
+            chunk[xs[cells] - left, ys[cells] - top] = owner
+            if owner == self.FREE and not chunk.any():
+                del self.chunks[chunk_id]
+
+    def _count_chunks(self, owner, chunk_ids, sign):
+        counts = self.owner_chunks.setdefault(owner, {})
+        for chunk_id, cells in self._group(chunk_ids):
+            number = sign * (chunk_ids.size if isinstance(cells, slice) else cells.size)
+            counts[chunk_id] = counts.get(chunk_id, 0) + number
+            if counts[chunk_id] == 0:
+                del counts[chunk_id]
+
+    def _write(self, xs, ys, owner):
+        """
+        Set the owner of the cells, keeping areas and boundaries up to date.
+        Only the changed cells and their neighbours are visited.
+        :return: previous owners of the changed cells
+        """
+        if xs.size == 0:
+            return np.empty(0, dtype=np.uint8)
+        # the changed cells, their neighbours and the neighbours of those
+        x_min, y_min = int(xs.min()) - 2, int(ys.min()) - 2
+        window = self.get_window(x_min, y_min, int(xs.max()) + 2, int(ys.max()) + 2)
+
+        previous = window[xs - x_min, ys - y_min]
+        changed = previous != owner
+        xs, ys, previous = xs[changed], ys[changed], previous[changed]
+        if xs.size == 0:
+            return previous
+
+        if self.delta is not None:
+            self.delta.add_cells(xs, ys, owner)
+
+        affected_xs, affected_ys = self._unique((xs[:, None] + NEIGHBOURHOOD_DX).ravel(),
+                                                (ys[:, None] + NEIGHBOURHOOD_DY).ravel())
+        old_owners = window[affected_xs - x_min, affected_ys - y_min]
+
+        self.areas -= np.bincount(previous, minlength=self.areas.size)
+        self.areas[owner] += xs.size
+        window[xs - x_min, ys - y_min] = owner
+        chunk_ids = self.chunk_ids(xs, ys)
+        self._store(xs, ys, chunk_ids, owner)
+
+        for old_owner in np.unique(previous).tolist():
+            if old_owner != self.FREE:
+                self._count_chunks(old_owner, chunk_ids[previous == old_owner], -1)
+        if owner == self.FREE:
+            self.spawn_cells.add(xs, ys)
+        else:
+            self._count_chunks(owner, chunk_ids, 1)
+            self.spawn_cells.remove(xs[previous == self.FREE], ys[previous == self.FREE])
+
+        new_owners = window[affected_xs - x_min, affected_ys - y_min]
+        edge = self._is_edge(window, affected_xs - x_min, affected_ys - y_min)
+        for old_owner in np.unique(old_owners).tolist():
+            if old_owner != self.FREE:
+                stale = old_owners == old_owner
+                self.get_boundary(old_owner).difference_update(
+                    self._to_points(affected_xs[stale], affected_ys[stale]))
+        for new_owner in np.unique(new_owners[edge]).tolist():
+            if new_owner != self.FREE:
+                fresh = edge & (new_owners == new_owner)
+                self.get_boundary(new_owner).update(self._to_points(affected_xs[fresh], affected_ys[fresh]))
+        return previous
+
+    def assign(self, points, owner):
+        """
+        Give the points to the owner
+        :return: previous owners of the points which changed hands
+        """
+        return self._write(*self.indices(points), owner)
+
+    def release(self, points, owner):
+        """
+        Free the points which belong to the owner
+        :return: released points
+        """
+        xs, ys = self.indices(points)
+        if xs.size == 0:
+            return []
+        x_min, y_min = int(xs.min()), int(ys.min())
+        window = self.get_window(x_min, y_min, int(xs.max()), int(ys.max()))
+        owned = window[xs - x_min, ys - y_min] == owner
+        xs, ys = xs[owned], ys[owned]
+
+        self._write(xs, ys, self.FREE)
+        return self._to_points(xs, ys)
+
+    def release_all(self, owner):
+        """
+        Free every cell of the owner, visiting only the chunks it has cells in
+        """
+        self._write(*self.get_indices(owner), self.FREE)
+
+    def get_state(self):
+        """
+        :return: arrays of the owners of the cells and of everything derived from them, except the lines
+        """
+        chunk_ids = np.fromiter(self.chunks, dtype=np.intp, count=len(self.chunks))
+        chunks = np.stack(list(self.chunks.values())) if self.chunks else \
+            np.empty((0, self.chunk_size, self.chunk_size), dtype=np.uint8)
+        # boundaries and chunk counts as rows of an owner and a point or an owner, a chunk and a count
+        boundaries = [np.empty((0, 3), dtype=np.intp)]
+        for owner, points in self.boundaries.items():
+            if points:
+                rows = np.empty((len(points), 3), dtype=np.intp)
+                rows[:, 0] = owner
+                rows[:, 1:] = list(points)
+                boundaries.append(rows)
+        owner_chunks = [(owner, chunk_id, count) for owner, counts in self.owner_chunks.items()
+                        for chunk_id, count in counts.items()]
+        return {
+            'chunk_ids': chunk_ids,
+            'chunks': chunks,
+            'areas': self.areas.copy(),
+            'boundaries': np.concatenate(boundaries),
+            'owner_chunks': np.array(owner_chunks, dtype=np.intp).reshape(-1, 3),
+            'spawn_cells': self.spawn_cells.get_state(),
+        }
+
+    def set_state(self, state):
+        """
+        Restore the cells from get_state, the lines are left to their owners
+        """
+        chunks = state['chunks'].copy()
+        self.chunks = dict(zip(state['chunk_ids'].tolist(), chunks))
+        self.areas = state['areas'].copy()
+        self.boundaries = {}
+        boundaries = state['boundaries']
+        for owner in np.unique(boundaries[:, 0]).tolist():
+            rows = boundaries[boundaries[:, 0] == owner]
+            self.boundaries[owner] = set(zip(rows[:, 1].tolist(), rows[:, 2].tolist()))
+        self.owner_chunks = {}
+        for owner, chunk_id, count in state['owner_chunks'].tolist():
+            self.owner_chunks.setdefault(owner, {})[chunk_id] = count
+        self.spawn_cells.set_state(state['spawn_cells'])
@@ -0,0 +1,121 @@
+from functools import lru_cache
+
+import numpy as np
+import pygame
+
+from config import CONSTS
+from game_objects.board import Board
+from game_objects.snapshot import BONUS_TYPES
+from game_objects.sprites import SpriteAtlas
+from helpers import DrawableObj, draw_grid_lines
+
+
+@lru_cache(maxsize=None)
+def blend_with_white(color):
+    """
+    :param color: RGBA color as a tuple
+    :return: RGB color of the color blitted over a white background, exactly as pygame blends it
+    """
+    pixel = pygame.Surface((1, 1))
+    pixel.fill(CONSTS.WHITE)
+    block = pygame.Surface((1, 1), pygame.SRCALPHA)
+    block.set_colorkey(CONSTS.BLACK)  # blitted the same way as scene.Cell
+    block.fill(color)
+    pixel.blit(block, (0, 0))
+    return tuple(pixel.get_at((0, 0)))[:3]
+
+
+class PixelBoardRenderer(DrawableObj):
+    """
+    Base of the renderers which write cell colors into a pixel array of one pixel per cell
+    and draw it with a single scaled blit, cached bonus icons and a cached grid lines overlay.
+    """
+    MIN_LINED_CELL_SIZE = 4  # cells smaller than that are drawn without grid lines
+    MIN_ICON_CELL_SIZE = 8  # cells smaller than that show bonuses without icons
+
+    def __init__(self, screen, width, height, rect=(0, 0, CONSTS.GRID_WIDTH, CONSTS.GRID_HEIGHT)):
+        """
+        :param width: board width in cells
+        :param height: board height in cells
+        :param rect: rectangle of the screen to draw to, shrunk to a whole number of pixels per cell
+        """
+        super().__init__(screen)
+        self.width, self.height = width, height
+        self.rect = pygame.Rect(rect)
+        cell_size = (self.rect.width // width, self.rect.height // height)
+        if min(cell_size) > 0:
+            self.rect.size = (cell_size[0] * width, cell_size[1] * height)
+
+        self.pixels = np.empty((width, height, 3), dtype=np.uint8)
+        self.palette = np.zeros((np.iinfo(np.uint8).max + 1, 3), dtype=np.uint8)  # indexed by owner id
+        self.palette[Board.FREE] = CONSTS.EMPTY_CELL_COLOR[:3]
+        self.surface = pygame.Surface((width, height))
+        self.scaled = pygame.Surface(self.rect.size)
+
+        self.lines = None
+        if min(cell_size) >= self.MIN_LINED_CELL_SIZE:
+            lines_key_color = (255, 0, 255)
+            self.lines = pygame.Surface((self.rect.width + 2, self.rect.height + 2))
+            self.lines.fill(lines_key_color)
+            draw_grid_lines(self.lines, self.rect.size, cell_size)
+            self.lines.set_colorkey(lines_key_color)
+
+        self.bonus_sprites = None  # bonuses of cells too small for their icons are drawn as their color
+        if min(cell_size) >= self.MIN_ICON_CELL_SIZE:
+            self.bonus_sprites = SpriteAtlas({bonus.sprite: bonus.color for bonus in BONUS_TYPES}, cell_size)
+
+    def _draw(self, owners, lines, heads, bonuses):
+        """
+        :param owners: owner id of every cell, indexed [x, y]
+        :param lines: color, x indices and y indices of every line
+        :param heads: color, x and y of every head, positions may lie between cells
+        :param bonuses: type, x and y of every bonus
+        :return: rectangle of the screen the board was drawn to
+        """
+        np.take(self.palette, owners, axis=0, out=self.pixels)
+        for color, xs, ys in lines:
+            self.pixels[xs, ys] = blend_with_white(tuple(color))
+        for bonus_type, x, y in bonuses:
+            self.pixels[x, y] = blend_with_white(bonus_type.color)
+
+        pygame.surfarray.blit_array(self.surface, self.pixels)
+        pygame.transform.scale(self.surface, self.rect.size, self.scaled)
+        self.screen.blit(self.scaled, self.rect)
+
+        cell_width, cell_height = self.rect.width / self.width, self.rect.height / self.height
+        if self.bonus_sprites is not None:
+            for bonus_type, x, y in bonuses:
+                self.bonus_sprites.blit(self.screen, bonus_type.sprite, (self.rect.x + round(x * cell_width),
+                                                                         self.rect.y + round(y * cell_height)))
+        for color, x, y in heads:
+            self.screen.fill(blend_with_white(tuple(color)),
+                             (self.rect.x + round(x * cell_width), self.rect.y + round(y * cell_height),
+                              max(1, round(cell_width)), max(1, round(cell_height))))
+        if self.lines is not None:
+            return self.screen.blit(self.lines, self.rect.topleft).union(self.rect)
+        return self.rect
+
+
+class BoardSurface(PixelBoardRenderer):
+    """
+    Renderer of the board of a GameScene
+    """
+
+    def __init__(self, screen, board, rect=(0, 0, CONSTS.GRID_WIDTH, CONSTS.GRID_HEIGHT)):
+        super().__init__(screen, board.width, board.height, rect)
+        self.board = board
+
+    def draw(self, players, bonuses, alpha=1.0):
+        """
+        :param alpha: part of the tick passed since the last update, heads are drawn that far on their way
+                      between the last two cells
+        :return: rectangle of the screen the board was drawn to
+        """
+        for player in players:
+            self.palette[player.id] = player.territory.color[:3]
+        lines = [(player.line_color,
+                  *self.board.indices([point for point in player.line_points if point != (player.x, player.y)]))
+                 for player in players]
+        heads = [(player.color, *player.get_drawn_position(alpha)) for player in players]
+        return self._draw(self.board.get_owners(), lines, heads,
+                          [(type(bonus), bonus.x, bonus.y) for bonus in bonuses])
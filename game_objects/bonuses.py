@@ -4,7 +4,7 @@ from config import CONSTS
 
 
 class Bonus:
-    image_path = None
+    sprite = None  # name of the icon in the sprites directory
     color = None
     name = None
     activated = False
@@ -38,7 +38,7 @@ class Bonus:
 
 class Nitro(Bonus):
     color = (255, 249, 0, 255)
-    image_path = 'sprites/flash.png'
+    sprite = 'flash'
     name = 'Nitro'
     activated = False
 
@@ -55,7 +55,7 @@ class Nitro(Bonus):
 
 class ExtraLife(Bonus):
     color = (234, 10, 10, 255)
-    image_path = 'sprites/hart.png'
+    sprite = 'hart'
     name = 'extra_life'
 
     def apply(self, player):
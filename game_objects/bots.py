@@ -0,0 +1,209 @@
+import random
+
+import numpy as np
+
+from config import CONSTS
+
+# directions in the order of Player.move_commands, bots choose them by index
+DIRECTIONS = ('up', 'down', 'left', 'right')
+DX = np.array([0, 0, -1, 1])
+DY = np.array([-1, 1, 0, 0])
+OPPOSITE = np.array([1, 0, 3, 2])
+CLOCKWISE = np.array([3, 2, 0, 1])
+COUNTERCLOCKWISE = np.array([2, 3, 1, 0])
+KEEP = -1  # decision to keep the current direction
+
+# contents of the cells around a head, as seen by the player
+WALL = -1
+FREE = 0
+OWN = 1
+ENEMY = 2
+OWN_LINE = 3
+ENEMY_LINE = 4
+
+
+class Observations:
+    """
+    What a group of players sees on a tick: a row of every array per player.
+    Cells around the head are indexed [x, y] like the board, the head is in the middle.
+    """
+
+    def __init__(self, ids, positions, directions, line_lengths, areas, cells):
+        self.ids = ids  # player ids
+        self.positions = positions  # x and y of the heads
+        self.directions = directions  # indices of the current directions in DIRECTIONS
+        self.line_lengths = line_lengths
+        self.areas = areas
+        self.cells = cells  # cells around the heads, see WALL, FREE, OWN...
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, rows):
+        """
+        :param rows: slice of the players
+        :return: observations of the players, views of the same arrays
+        """
+        return Observations(self.ids[rows], self.positions[rows], self.directions[rows],
+                            self.line_lengths[rows], self.areas[rows], self.cells[rows])
+
+    @property
+    def radius(self):
+        return self.cells.shape[1] // 2
+
+    def get_ahead(self):
+        """
+        :return: cells next to the heads in every direction, a row per player and a column per direction
+        """
+        radius = self.radius
+        return self.cells[:, radius + DX, radius + DY]
+
+    @classmethod
+    def observe(cls, players, board, radius=CONSTS.BOT_VIEW_RADIUS):
+        """
+        Build the observations of all players at once
+        :param players: players to observe, the rows follow their order
+        :param board: board of the players, the lines of all players on it are seen
+        """
+        ids = np.array([p.id for p in players], dtype=np.intp)
+        positions = np.array([(p.x, p.y) for p in players], dtype=np.intp).reshape(-1, 2)
+        directions = np.array([list(p.move_commands.values()).index(p.direction) for p in players], dtype=np.intp)
+        line_lengths = np.array([len(p.line_points) for p in players], dtype=np.intp)
+        areas = board.areas[ids]
+
+        offsets = np.arange(-radius, radius + 1)
+        xs, ys = np.broadcast_arrays(positions[:, 0, None, None] + offsets[None, :, None],
+                                     positions[:, 1, None, None] + offsets[None, None, :])
+        owners = board.owners_at(xs, ys)
+        own = owners == ids[:, None, None]
+        cells = np.where(owners == board.FREE, FREE, np.where(own, OWN, ENEMY)).astype(np.int8)
+
+        # lines of every player, not only the observed ones, are looked up in the registry of the board
+        # by the linear indices of their points, a point can be on the lines of several players
+        pairs = [(x * board.height + y, owner.id) for (x, y), owners in board.lines.items() for owner in owners]
+        if pairs:
+            keys, owner_ids = np.array(pairs, dtype=np.intp).T
+            view_keys = xs * board.height + ys
+            cells[np.isin(view_keys, keys)] = ENEMY_LINE
+            own_keys = keys * board.areas.size + owner_ids
+            cells[np.isin(view_keys * board.areas.size + ids[:, None, None], own_keys)] = OWN_LINE
+
+        cells[(xs < 0) | (xs >= board.width) | (ys < 0) | (ys >= board.height)] = WALL
+        return cls(ids, positions, directions, line_lengths, areas, cells)
+
+
+class Controller:
+    """
+    Chooses directions of a group of players. A controller is asked once per tick with the observations
+    of all of its players, so it can decide for all of them with array operations.
+    """
+
+    def decide(self, observations):
+        """
+        :param observations: Observations of the controlled players
+        :return: array of indices in DIRECTIONS, a row per player, KEEP to keep the direction
+        """
+        raise NotImplementedError
+
+    def get_state(self):
+        """
+        :return: copy of everything the decisions depend on besides the observations, for snapshots
+        """
+        return None
+
+    def set_state(self, state):
+        pass
+
+
+def get_safe(observations):
+    """
+    :return: mask of the directions every player can move in without dying on the next step
+    """
+    ahead = observations.get_ahead()
+    safe = (ahead != WALL) & (ahead != OWN_LINE)
+    safe[np.arange(len(observations)), OPPOSITE[observations.directions]] = False
+    return safe
+
+
+class RandomWalker(Controller):
+    """
+    Turns in a random safe direction now and then and when the way ahead is unsafe
+    """
+
+    def __init__(self, rng=None, turn_chance=0.2):
+        """
+        :param rng: numpy Generator, seeded from the random module if not given
+        """
+        self.rng = rng if rng is not None else np.random.default_rng(random.getrandbits(64))
+        self.turn_chance = turn_chance
+
+    def decide(self, observations):
+        rows = np.arange(len(observations))
+        safe = get_safe(observations)
+        turn = (self.rng.random(rows.size) < self.turn_chance) | ~safe[rows, observations.directions]
+        # random order of the directions, the safe ones first
+        choice = np.argmax(self.rng.random(safe.shape) + safe, axis=1)
+        return np.where(turn, choice, KEEP)
+
+    def get_state(self):
+        return self.rng.bit_generator.state
+
+    def set_state(self, state):
+        self.rng.bit_generator.state = state
+
+
+class LoopCloser(Controller):
+    """
+    Leaves the territory, draws a square by turning clockwise after every side and comes back.
+    The side is picked at random every time the player is at home.
+    """
+
+    def __init__(self, rng=None, min_side=3, max_side=8):
+        """
+        :param rng: numpy Generator, seeded from the random module if not given
+        """
+        self.rng = rng if rng is not None else np.random.default_rng(random.getrandbits(64))
+        self.min_side = min_side
+        self.max_side = max_side
+        # state of every player, indexed by player id
+        size = np.iinfo(np.uint8).max + 1
+        self.sides = np.full(size, min_side, dtype=np.intp)
+        self.last_turns = np.zeros(size, dtype=np.intp)  # line length at the last turn
+
+    def decide(self, observations):
+        rows, ids = np.arange(len(observations)), observations.ids
+        lengths, directions = observations.line_lengths, observations.directions
+
+        home = lengths == 0
+        self.sides[ids[home]] = self.rng.integers(self.min_side, self.max_side + 1, home.sum())
+        self.last_turns[ids[home]] = 0
+
+        # a turn after every side until the third one, then straight home
+        sides = self.sides[ids]
+        turn = ~home & (lengths % sides == 0) & (lengths <= 3 * sides) & (self.last_turns[ids] != lengths)
+        self.last_turns[ids[turn]] = lengths[turn]
+        decision = np.where(turn, CLOCKWISE[directions], directions)
+
+        # dodge whatever is ahead, clockwise if possible
+        safe = get_safe(observations)
+        blocked = ~safe[rows, decision]
+        clockwise, counterclockwise = CLOCKWISE[directions], COUNTERCLOCKWISE[directions]
+        dodge = np.where(safe[rows, clockwise], clockwise, counterclockwise)
+        decision = np.where(blocked, dodge, decision)
+        return np.where(decision == directions, KEEP, decision)
+
+    def get_state(self):
+        return self.rng.bit_generator.state, self.sides.copy(), self.last_turns.copy()
+
+    def set_state(self, state):
+        rng_state, sides, last_turns = state
+        self.rng.bit_generator.state = rng_state
+        self.sides[:] = sides
+        self.last_turns[:] = last_turns
+
+
+# reference bots by name
+BOTS = {
+    'random': RandomWalker,
+    'loop': LoopCloser,
+}
@@ -0,0 +1,56 @@
+import numpy as np
+
+
+class TickDelta:
+    """
+    Changes the simulation made on a tick, collected as they happen: cells which changed hands, points
+    added to and removed from the lines, head moves, bonuses and losers. Its size depends on what
+    happened on the tick, not on the size of the board.
+    """
+
+    def __init__(self, tick, resync=False):
+        """
+        :param tick: number of the tick the changes were made on
+        :param resync: the state changed as a whole (a new match or a restored snapshot), the changes
+                       are empty and everything has to be read again
+        """
+        self.tick = tick
+        self.resync = resync
+        self.cells = []  # x indices, y indices and the new owner of every write to the board, in order
+        self.lines_added = []  # player id, x and y of every point which appeared in a line
+        self.lines_removed = []  # player id, x and y of every point which left a line
+        self.heads = {}  # player id -> new position of the head, only for the players which moved
+        self.bonuses_spawned = []  # bonuses put on the board
+        self.bonuses_taken = []  # player id and bonus of every bonus taken off the board
+        self.losers = []  # ids of the players who lost
+
+    def add_cells(self, xs, ys, owner):
+        self.cells.append((xs, ys, owner))
+
+    def get_cells(self):
+        """
+        :return: x, y and owner of every cell which changed hands, a row per cell. A cell written
+                 several times is reported once, with its last owner.
+        """
+        if not self.cells:
+            return np.empty((0, 3), dtype=np.int32)
+        xs = np.concatenate([xs for xs, _, _ in self.cells])
+        ys = np.concatenate([ys for _, ys, _ in self.cells])
+        owners = np.concatenate([np.full(xs.size, owner) for xs, _, owner in self.cells])
+        # the last write of a cell is its first one in the reversed order
+        keys = (xs * (int(ys.max()) + 1) + ys)[::-1]
+        _, last = np.unique(keys, return_index=True)
+        last = xs.size - 1 - last
+        return np.column_stack([xs[last], ys[last], owners[last]]).astype(np.int32)
+
+    def get_points(self):
+        """
+        :return: every point the tick touched: changed cells, line points, heads and bonuses
+        """
+        cells = self.get_cells()
+        points = set(zip(cells[:, 0].tolist(), cells[:, 1].tolist()))
+        points.update((x, y) for _, x, y in self.lines_added + self.lines_removed)
+        points.update(self.heads.values())
+        points.update((bonus.x, bonus.y) for bonus in self.bonuses_spawned)
+        points.update((bonus.x, bonus.y) for _, bonus in self.bonuses_taken)
+        return points
@@ -0,0 +1,164 @@
+import random
+from collections import Counter
+
+import numpy as np
+
+from config import CONSTS
+
+
+class FreeCells:
+    """
+    Cells of a rectangular region of the board where a player or a bonus can appear: free cells which
+    aren't blocked by a head's surroundings, a line or a bonus. The cells are kept in an array with the
+    place of every cell in it, a cell leaves the array by moving the last one into its place, so a random
+    cell is picked by index in constant time however full the board is.
+    """
+
+    def __init__(self, board, region):
+        """
+        :param board: board the free cells belong to
+        :param region: x_min, y_min, x_max, y_max of the region, the maximums included
+        """
+        self.board = board
+        self.region = region
+        x_min, y_min, x_max, y_max = region
+        self.width, self.height = x_max - x_min + 1, y_max - y_min + 1
+        size = self.width * self.height
+        # cells as indices in the region, (x - x_min) * height + y - y_min; the first count ones can be picked
+        self.cells = np.arange(size, dtype=np.int32)
+        self.count = size
+        # place of every cell in cells, -1 for the cells which can't be picked
+        self.places = np.arange(size, dtype=np.int32)
+        # number of head surroundings, lines and bonuses on every cell
+        self.blocked = np.zeros(size, dtype=np.int16)
+        # heads whose surroundings are blocked
+        self.heads = Counter()
+
+    def __len__(self):
+        return self.count
+
+    def _get_indices(self, xs, ys):
+        """
+        :return: indices in the region of the cells which lie in it
+        """
+        x_min, y_min, x_max, y_max = self.region
+        inside = (xs >= x_min) & (xs <= x_max) & (ys >= y_min) & (ys <= y_max)
+        return (xs[inside] - x_min) * self.height + ys[inside] - y_min
+
+    def _leave(self, indices):
+        """
+        Take the cells out of the picked ones, the last picked cells move into the places they leave
+        :param indices: unique indices of cells which can be picked
+        """
+        end = self.count - indices.size
+        places = self.places[indices]
+        self.places[indices] = -1
+        holes = np.sort(places[places < end])
+        tail = self.cells[end:self.count]
+        movers = tail[self.places[tail] >= 0]
+        self.cells[holes] = movers
+        self.places[movers] = holes
+        self.count = end
+
+    def _enter(self, indices):
+        """
+        :param indices: unique indices of cells which can't be picked
+        """
+        end = self.count + indices.size
+        self.cells[self.count:end] = indices
+        self.places[indices] = np.arange(self.count, end)
+        self.count = end
+
+    def _is_free(self, indices):
+        xs, ys = np.divmod(indices, self.height)
+        return self.board.owners_at(xs + self.region[0], ys + self.region[1]) == self.board.FREE
+
+    def add(self, xs, ys):
+        """
+        :param xs, ys: unique indices of cells which became free
+        """
+        indices = self._get_indices(xs, ys)
+        self._enter(indices[(self.blocked[indices] == 0) & (self.places[indices] < 0)])
+
+    def remove(self, xs, ys):
+        """
+        :param xs, ys: unique indices of free cells which were taken
+        """
+        indices = self._get_indices(xs, ys)
+        self._leave(indices[self.places[indices] >= 0])
+
+    def block(self, xs, ys):
+        """
+        Keep the cells from being picked till they are unblocked as many times
+        :param xs, ys: indices of cells, repeated ones are blocked several times
+        """
+        indices, counts = np.unique(self._get_indices(xs, ys), return_counts=True)
+        was_open = self.blocked[indices] == 0
+        self.blocked[indices] += counts.astype(self.blocked.dtype)
+        self._leave(indices[was_open & (self.places[indices] >= 0)])
+
+    def unblock(self, xs, ys):
+        indices, counts = np.unique(self._get_indices(xs, ys), return_counts=True)
+        self.blocked[indices] -= counts.astype(self.blocked.dtype)
+        opened = indices[self.blocked[indices] == 0]
+        self._enter(opened[self._is_free(opened)])
+
+    def block_point(self, point):
+        self.block(np.array([point[0]]), np.array([point[1]]))
+
+    def unblock_point(self, point):
+        self.unblock(np.array([point[0]]), np.array([point[1]]))
+
+    @staticmethod
+    def _get_surroundings(heads):
+        """
+        :return: x and y indices of the cells closer to the heads than CONSTS.SPAWN_HEAD_DISTANCE,
+                 a cell near several heads is repeated
+        """
+        offsets = np.arange(-CONSTS.SPAWN_HEAD_DISTANCE, CONSTS.SPAWN_HEAD_DISTANCE + 1)
+        heads = np.array(list(heads), dtype=np.intp).reshape(-1, 2)
+        xs = heads[:, 0, None, None] + offsets[None, :, None]
+        ys = heads[:, 1, None, None] + offsets[None, None, :]
+        xs, ys = np.broadcast_arrays(xs, ys)
+        return xs.ravel(), ys.ravel()
+
+    def set_heads(self, heads):
+        """
+        Block the surroundings of the heads instead of the ones of the heads given last time,
+        only the heads which moved since then are updated
+        :param heads: (x, y) of every head
+        """
+        heads = Counter(heads)
+        if heads == self.heads:
+            return
+        self.unblock(*self._get_surroundings((self.heads - heads).elements()))
+        self.block(*self._get_surroundings((heads - self.heads).elements()))
+        self.heads = heads
+
+    def sample(self, rng=random):
+        """
+        :return: random point which can be picked or None if there are none
+        """
+        if self.count == 0:
+            return None
+        x, y = divmod(int(self.cells[rng.randrange(self.count)]), self.height)
+        return self.region[0] + x, self.region[1] + y
+
+    def get_state(self):
+        """
+        :return: copies of the cells which can be picked, in their order, of the blocked counts and of the heads
+        """
+        return {
+            'cells': self.cells[:self.count].copy(),
+            'blocked': self.blocked.copy(),
+            'heads': np.array(list(self.heads.elements()), dtype=np.intp).reshape(-1, 2),
+        }
+
+    def set_state(self, state):
+        cells = state['cells']
+        self.count = cells.size
+        self.cells[:self.count] = cells
+        self.places[:] = -1
+        self.places[cells] = np.arange(self.count)
+        self.blocked = state['blocked'].copy()
+        self.heads = Counter(zip(state['heads'][:, 0].tolist(), state['heads'][:, 1].tolist()))
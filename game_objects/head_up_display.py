@@ -2,17 +2,73 @@ from typing import List
 
 import pygame
 
-from helpers import DrawableObj
+from config import CONSTS
+from helpers import DrawableObj, render_text
 from game_objects.player import Player
+from game_objects.profiler import TickProfiler
 
 
 class HeadUpDisplay(DrawableObj):
     """Represent all necessary Head-Up Display information on screen.
     """
 
-    def __init__(self, screen):
+    def __init__(self, screen, rect=None):
         super().__init__(screen)
-        self.font = pygame.font.Font(None, 20)
+        self.font_size = 20
+        self.visible = False
+        # profiler overlay takes the bottom of the scores panel by default
+        self.rect = pygame.Rect(rect) if rect is not None else \
+            pygame.Rect(CONSTS.GRID_WIDTH + 5, CONSTS.WINDOW_HEIGHT - 150, CONSTS.WINDOW_WIDTH - CONSTS.GRID_WIDTH - 10,
+                        120)
 
-    def draw(self, players: List[Player]):
-        pass
+    def toggle(self):
+        self.visible = not self.visible
+
+    def get_content(self, profiler: TickProfiler = None):
+        """
+        :return: lines of text and heights of the bars of the last completed ticks, which change once
+                 per tick, with True for the slowest tick; None if the overlay isn't drawn
+        """
+        if not self.visible or profiler is None:
+            return None
+        _, durations = profiler.get_last(CONSTS.HUD_TICKS, completed=True)
+        if len(durations) == 0:
+            return None
+        totals = durations.sum(axis=1) * 1000
+        phase, phase_time = profiler.get_slowest_phase(CONSTS.HUD_TICKS, completed=True)
+        lines = (
+            f"tick: {totals[-1]:.2f} ms, max {totals.max():.2f} ms",
+            f"slowest: {phase} {phase_time * 1000:.2f} ms",
+        )
+
+        # bars of the last tick times, scaled to the slowest one
+        chart = self.__get_chart()
+        bar_width = max(1, chart.width // CONSTS.HUD_TICKS)
+        scale = chart.height / max(totals.max(), 1e-9)
+        bars = tuple((max(1, int(total * scale)), bool(total == totals.max()))
+                     for total in totals[-(chart.width // bar_width):])
+        return lines, bars
+
+    def __get_chart(self):
+        return pygame.Rect(self.rect.x + 4, self.rect.y + 40, self.rect.width - 8, self.rect.height - 44)
+
+    def draw(self, players: List[Player], profiler: TickProfiler = None, content=None):
+        """
+        :param content: what get_content returned, asked from the profiler if not given
+        """
+        content = content if content is not None else self.get_content(profiler)
+        if content is None:
+            return
+        lines, bars = content
+
+        pygame.draw.rect(self.screen, CONSTS.WHITE, self.rect)
+        pygame.draw.rect(self.screen, CONSTS.GREY, self.rect, width=1)
+        for i, line in enumerate(lines):
+            self.screen.blit(render_text(line, self.font_size, CONSTS.BLACK),
+                             (self.rect.x + 4, self.rect.y + 4 + i * 16))
+
+        chart = self.__get_chart()
+        bar_width = max(1, chart.width // CONSTS.HUD_TICKS)
+        for i, (height, slowest) in enumerate(bars):
+            pygame.draw.rect(self.screen, CONSTS.RED if slowest else CONSTS.BLUE,
+                             (chart.x + i * bar_width, chart.bottom - height, bar_width, height))
@@ -1,12 +1,132 @@
+from collections.abc import MutableSequence
 from copy import copy
+
+import numpy as np
+
 from game_objects.territory import Territory
 from config import CONSTS
 
 
+class LinePoints(MutableSequence):
+    """
+    Ordered points of a player's line with the number of times every point occurs in it.
+    The owner is also registered for every point of the line in the lines registry of the board,
+    points which appear in or leave the line are recorded to the TickDelta of the board and
+    kept from being picked as spawn points.
+    """
+
+    def __init__(self, owner=None, board=None, points=()):
+        """
+        :param owner: player the line belongs to
+        :param board: Board with the registry {point: owners of the lines which go through it}
+                      shared by its lines, None for a line of its own
+        """
+        self._points = []
+        self.counts = {}
+        self.owner = owner
+        self.board = board
+        self.registry = board.lines if board is not None else {}
+        self.extend(points)
+
+    def _record(self, changes, point):
+        if self.board is not None and self.board.delta is not None:
+            getattr(self.board.delta, changes).append((self.owner.id, *point))
+
+    def _count(self, point):
+        count = self.counts.get(point, 0)
+        self.counts[point] = count + 1
+        if count == 0:
+            self.registry.setdefault(point, set()).add(self.owner)
+            self._record('lines_added', point)
+            if self.board is not None:
+                self.board.spawn_cells.block_point(point)
+
+    def _uncount(self, point):
+        count = self.counts[point] - 1
+        if count > 0:
+            self.counts[point] = count
+            return
+        del self.counts[point]
+        owners = self.registry[point]
+        owners.discard(self.owner)
+        if not owners:
+            del self.registry[point]
+        self._record('lines_removed', point)
+        if self.board is not None:
+            self.board.spawn_cells.unblock_point(point)
+
+    def __getitem__(self, index):
+        return self._points[index]
+
+    def __setitem__(self, index, value):
+        old = self._points[index]
+        self._points[index] = value
+        for point in (old if isinstance(index, slice) else [old]):
+            self._uncount(point)
+        for point in (self._points[index] if isinstance(index, slice) else [value]):
+            self._count(point)
+
+    def __delitem__(self, index):
+        old = self._points[index]
+        del self._points[index]
+        for point in (old if isinstance(index, slice) else [old]):
+            self._uncount(point)
+
+    def __len__(self):
+        return len(self._points)
+
+    def __iter__(self):
+        return iter(self._points)
+
+    def __contains__(self, point):
+        return point in self.counts
+
+    def __add__(self, other):
+        return self._points + list(other)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self._points})"
+
+    def insert(self, index, value):
+        self._points.insert(index, value)
+        self._count(value)
+
+    def append(self, value):
+        self._points.append(value)
+        self._count(value)
+
+    def clear(self):
+        for point in self.counts:
+            owners = self.registry[point]
+            owners.discard(self.owner)
+            if not owners:
+                del self.registry[point]
+            self._record('lines_removed', point)
+        if self.board is not None and self.counts:
+            xs, ys = np.array(list(self.counts)).T
+            self.board.spawn_cells.unblock(xs, ys)
+        self._points.clear()
+        self.counts.clear()
+
+    def is_crossed_at(self, point):
+        """
+        :return: True if the point is on the line before its last point, where the owner's head has just moved to
+        """
+        return self.counts.get(point, 0) > (1 if self._points and self._points[-1] == point else 0)
+
+
+def get_head_and_line_colors(color):
+    """
+    :param color: RGBA territory color of a player
+    :return: RGBA colors of the player's head and of the player's tail outside the territory
+    """
+    return [i - 35 if i >= 35 else i for i in color[:-1]] + [color[-1]], list(color[:-1]) + [150]
+
+
 class Player:
     direction = None
 
-    def __init__(self, player_id, name, pos, color):
+    def __init__(self, player_id, name, pos, color, board=None):
         self.id = player_id
         self.name = name
         self.x = self.prev_x = pos[0]
@@ -20,18 +140,17 @@ class Player:
         self.extra_commands = {
             'nitro': CONSTS.NITRO1
         }
-        # color of player's head
-        self.color = [i - 35 if i >= 35 else i for i in color[:-1]] + [color[-1]]
+        # colors of player's head and of the player tail outside the territory
+        self.color, self.line_color = get_head_and_line_colors(color)
         self.territory_color = color
-        # color of the player tail outside the territory
-        self.line_color = list(color[:-1]) + [150]
         # captured territory
-        self.territory = Territory(self.x, self.y, color)
+        self.territory = Territory(self.x, self.y, color, board, player_id)
         # player lines outside the territory
-        self.line_points = []
+        self.line_points = LinePoints(self, self.territory.board)
 
         self.score = 0
         self.tick_score = 0
+        self.captures = 0  # number of captured areas
         self.direction = self.move_commands['up']
         self.tick = 0
 
@@ -86,6 +205,16 @@ class Player:
     def get_position(self):
         return self.x, self.y
 
+    def get_drawn_position(self, alpha=1.0):
+        """
+        Position of the head between the last two cells, the head moves from one cell to the next
+        during the ticks till the next move
+        :param alpha: part of the tick passed since the last update, from 0 to 1
+        :return: x and y in cells, as floats
+        """
+        progress = min((self.tick % self.moveable_tick + alpha) / self.moveable_tick, 1)
+        return self.prev_x + (self.x - self.prev_x) * progress, self.prev_y + (self.y - self.prev_y) * progress
+
     def is_eaten(self, players_grabs):
         """
         :param players_grabs: captured territories for all players
@@ -116,8 +245,8 @@ class Player:
 
 
 class Player2(Player):
-    def __init__(self, player_id, name, pos, color):
-        super().__init__(player_id, name, pos, color)
+    def __init__(self, player_id, name, pos, color, board=None):
+        super().__init__(player_id, name, pos, color, board)
         self.move_commands = {
             'up': CONSTS.W,
             'down': CONSTS.S,
@@ -0,0 +1,75 @@
+import time
+
+import numpy as np
+
+from config import CONSTS
+
+
+class TickProfiler:
+    """Durations of the phases of the last ticks, kept in a ring buffer."""
+    PHASES = ('status', 'bots', 'movement', 'capture', 'losers', 'collisions', 'territories', 'bonuses', 'respawn',
+              'rendering')
+
+    def __init__(self, size=CONSTS.PROFILER_TICKS):
+        self.size = size
+        self.phase_indices = {phase: index for index, phase in enumerate(self.PHASES)}
+        self.durations = np.zeros((size, len(self.PHASES)))  # seconds, a row per tick
+        self.ticks = np.zeros(size, dtype=np.int64)
+        self.count = 0  # number of ticks recorded since the start
+        self.row = 0
+        self.last_time = None
+
+    def start(self, tick):
+        """
+        Start recording a new tick
+        """
+        self.row = self.count % self.size
+        self.durations[self.row] = 0
+        self.ticks[self.row] = tick
+        self.count += 1
+        self.last_time = time.perf_counter()
+
+    def resume(self):
+        """
+        Continue recording the current tick, time since the last mark is not counted
+        """
+        self.last_time = time.perf_counter()
+
+    def mark(self, phase):
+        """
+        Add the time since the last mark to the phase of the current tick
+        """
+        now = time.perf_counter()
+        if self.count > 0:
+            self.durations[self.row, self.phase_indices[phase]] += now - self.last_time
+        self.last_time = now
+
+    def get_last(self, n=None, completed=False):
+        """
+        :param completed: leave out the current tick, which is still being recorded
+        :return: tick numbers and phase durations of the last n recorded ticks, oldest first
+        """
+        end = self.count - 1 if completed and self.count > 0 else self.count
+        n = min(n or self.size, end, self.size)
+        rows = np.arange(end - n, end) % self.size
+        return self.ticks[rows], self.durations[rows]
+
+    def get_slowest_phase(self, n=None, completed=False):
+        """
+        :return: name and mean duration of the phase which took the most time in the last n ticks
+        """
+        _, durations = self.get_last(n, completed)
+        if len(durations) == 0:
+            return None, 0
+        means = durations.mean(axis=0)
+        return self.PHASES[int(means.argmax())], float(means.max())
+
+    def dump(self, path):
+        """
+        Save the recorded ticks as CSV with durations in milliseconds
+        """
+        ticks, durations = self.get_last()
+        with open(path, 'w') as file:
+            file.write(','.join(['tick', *self.PHASES, 'total']) + '\n')
+            for tick, row in zip(ticks, durations * 1000):
+                file.write(','.join([str(tick), *(f'{value:.4f}' for value in row), f'{row.sum():.4f}']) + '\n')
@@ -0,0 +1,186 @@
+import struct
+
+import numpy as np
+
+from game_objects.replay import decode_command, encode_command
+from game_objects.snapshot import BONUS_TYPES
+
+# messages between the game server and its clients: a 4-byte length followed by the payload,
+# the first byte of the payload is the type of the message
+LENGTH = struct.Struct('>I')
+MAX_MESSAGE_SIZE = 1 << 24
+
+# client -> server
+COMMAND = b'C'  # direction and nitro in a byte, see replay.encode_command
+# server -> client
+WELCOME = b'W'  # player id of the client, 0 for a spectator, and the board size
+STATE = b'S'  # whole state of the match on a tick
+DELTA = b'D'  # changes of the match on the tick after the last state or delta, see TickDelta
+
+WELCOME_HEADER = struct.Struct('<cBII')
+# tick, board width and height, number of players and bonuses
+STATE_HEADER = struct.Struct('<cIIIHH')
+# tick, number of players, line points added and removed, changed cells, spawned and taken bonuses
+DELTA_HEADER = struct.Struct('<cIHIIIHH')
+# id, x, y, alive, line length, score multiplied by 10, a row per player
+PLAYER_COLUMNS = 6
+# both states and deltas start with the type and the tick
+TICK = struct.Struct('<cI')
+
+
+def frame(payload):
+    return LENGTH.pack(len(payload)) + payload
+
+
+async def read_message(reader):
+    """
+    :param reader: asyncio.StreamReader
+    :return: payload of the next message
+    """
+    length, = LENGTH.unpack(await reader.readexactly(LENGTH.size))
+    if length > MAX_MESSAGE_SIZE:
+        raise ValueError(f"message of {length} bytes is too long")
+    return await reader.readexactly(length)
+
+
+def encode_welcome(player_id, width, height):
+    return WELCOME_HEADER.pack(WELCOME, player_id, width, height)
+
+
+def decode_welcome(payload):
+    """
+    :return: player id, board width and height
+    """
+    _, player_id, width, height = WELCOME_HEADER.unpack(payload)
+    return player_id, width, height
+
+
+def encode_client_command(direction, nitro):
+    return COMMAND + bytes([encode_command(direction, nitro)])
+
+
+def decode_client_command(payload):
+    """
+    :return: direction and nitro
+    """
+    return decode_command(payload[1])
+
+
+def get_tick(payload):
+    """
+    :return: tick of a state or a delta
+    """
+    return TICK.unpack_from(payload)[1]
+
+
+def _get_players(scene):
+    """
+    :return: players of the scene sorted by id and their rows of PLAYER_COLUMNS
+    """
+    players = sorted(scene.players + scene.losers, key=lambda p: p.id)
+    alive = set(scene.players)
+    rows = np.array([(p.id, p.x, p.y, p in alive, len(p.line_points), round(p.score * 10)) for p in players],
+                    dtype=np.int32).reshape(-1, PLAYER_COLUMNS)
+    return players, rows
+
+
+def _get_bonus_rows(bonuses):
+    return np.array([(b.x, b.y, BONUS_TYPES.index(type(b))) for b in bonuses], dtype=np.int32).reshape(-1, 3)
+
+
+def encode_state(scene):
+    """
+    :return: payload with the owners of all cells, the players with their lines and the bonuses of the scene
+    """
+    board = scene.board
+    players, rows = _get_players(scene)
+    lines = np.array([point for p in players for point in p.line_points], dtype=np.int32).reshape(-1, 2)
+    header = STATE_HEADER.pack(STATE, scene.tick, board.width, board.height, len(rows), len(scene.bonuses))
+    return b''.join([header, rows.tobytes(), lines.tobytes(), _get_bonus_rows(scene.bonuses).tobytes(),
+                     board.get_owners().tobytes()])
+
+
+def encode_delta(scene):
+    """
+    :return: payload with the players and the changes of the last update of the scene, its size
+             depends on what happened on the tick and not on the size of the board
+    """
+    delta = scene.delta
+    _, rows = _get_players(scene)
+    added = np.array(delta.lines_added, dtype=np.int32).reshape(-1, 3)
+    removed = np.array(delta.lines_removed, dtype=np.int32).reshape(-1, 3)
+    cells = delta.get_cells()
+    spawned = _get_bonus_rows(delta.bonuses_spawned)
+    taken = _get_bonus_rows([bonus for _, bonus in delta.bonuses_taken])
+    header = DELTA_HEADER.pack(DELTA, delta.tick, len(rows), len(added), len(removed), len(cells), len(spawned),
+                               len(taken))
+    return b''.join([header, rows.tobytes(), added.tobytes(), removed.tobytes(), cells.tobytes(), spawned.tobytes(),
+                     taken.tobytes()])
+
+
+class _Arrays:
+    """
+    Reads arrays from a payload one after another
+    """
+
+    def __init__(self, payload, offset):
+        self.payload = payload
+        self.offset = offset
+
+    def take(self, count, dtype, columns=None):
+        array = np.frombuffer(self.payload, dtype=dtype, count=count * (columns or 1), offset=self.offset)
+        self.offset += array.nbytes
+        return array if columns is None else array.reshape(-1, columns)
+
+
+class State:
+    """
+    Match state received by a client, kept up to date by the deltas which follow it
+    """
+
+    def __init__(self, tick, players, lines, bonuses, owners):
+        """
+        :param players: a row of id, x, y, alive, line length and score multiplied by 10 per player
+        :param lines: {player id: points of the line}
+        :param bonuses: set of x, y and index in BONUS_TYPES of every bonus
+        :param owners: owners of the cells indexed [x, y]
+        """
+        self.tick = tick
+        self.players = players
+        self.lines = lines
+        self.bonuses = bonuses
+        self.owners = owners
+
+    def apply_delta(self, payload):
+        """
+        :return: False if the delta isn't of the next tick and can't be applied
+        """
+        _, tick, players_count, added_count, removed_count, cells_count, spawned_count, taken_count = \
+            DELTA_HEADER.unpack_from(payload)
+        if tick != self.tick + 1:
+            return False
+        arrays = _Arrays(payload, DELTA_HEADER.size)
+        self.tick = tick
+        self.players = arrays.take(players_count, np.int32, PLAYER_COLUMNS)
+        for player_id, x, y in arrays.take(added_count, np.int32, 3).tolist():
+            self.lines.setdefault(player_id, set()).add((x, y))
+        for player_id, x, y in arrays.take(removed_count, np.int32, 3).tolist():
+            self.lines[player_id].discard((x, y))
+        cells = arrays.take(cells_count, np.int32, 3)
+        self.owners[cells[:, 0], cells[:, 1]] = cells[:, 2]
+        self.bonuses.update(map(tuple, arrays.take(spawned_count, np.int32, 3).tolist()))
+        self.bonuses.difference_update(map(tuple, arrays.take(taken_count, np.int32, 3).tolist()))
+        return True
+
+
+def decode_state(payload):
+    _, tick, width, height, players_count, bonuses_count = STATE_HEADER.unpack_from(payload)
+    arrays = _Arrays(payload, STATE_HEADER.size)
+    players = arrays.take(players_count, np.int32, PLAYER_COLUMNS)
+    points = arrays.take(int(players[:, 4].sum()), np.int32, 2).tolist()
+    starts = np.concatenate([[0], np.cumsum(players[:, 4])]).tolist()
+    lines = {player_id: set(map(tuple, points[start:end]))
+             for player_id, start, end in zip(players[:, 0].tolist(), starts, starts[1:])}
+    bonuses = set(map(tuple, arrays.take(bonuses_count, np.int32, 3).tolist()))
+    owners = arrays.take(width * height, np.uint8).reshape(width, height).copy()
+    return State(tick, players, lines, bonuses, owners)
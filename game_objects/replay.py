@@ -0,0 +1,108 @@
+import struct
+
+from game_objects.bots import DIRECTIONS
+
+MAGIC = b'GTMR'
+VERSION = 2  # 2: players and bonuses spawn from the free cell index
+GAME_MODES = ('classic', 'timeLIMIT')
+# magic, version, seed, game mode, players count, width, height, followed by the length and the name of the bots
+HEADER = struct.Struct('<4sBQBBII')
+# tick, player id, command: direction in the low 3 bits, nitro in the next 2
+COMMAND = struct.Struct('<IBB')
+END = 0  # player id of the record which ends the replay, no player has it
+NITRO_CODES = {None: 0, True: 1, False: 2}
+NITRO_VALUES = {code: value for value, code in NITRO_CODES.items()}
+
+
+def encode_command(direction, nitro):
+    """
+    :param direction: 'up', 'down', 'left', 'right' or None
+    :param nitro: True, False or None
+    :return: command byte
+    """
+    return (0 if direction is None else DIRECTIONS.index(direction) + 1) | NITRO_CODES[nitro] << 3
+
+
+def decode_command(code):
+    """
+    :return: direction and nitro of the command byte
+    """
+    direction = code & 0b111
+    return None if direction == 0 else DIRECTIONS[direction - 1], NITRO_VALUES[code >> 3]
+
+
+class ReplayRecorder:
+    """
+    Writes the seed and options of a match and every command applied to its players to a binary file.
+    Everything else is derived from them, so replaying the commands plays the same match.
+    """
+
+    def __init__(self, path, seed, game_mode, players_count, width, height, bots=None):
+        """
+        :param bots: name of the reference bot of the players beyond the first two or None
+        """
+        self.path = path
+        name = (bots or '').encode()
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION, seed, GAME_MODES.index(game_mode), players_count, width, height))
+        self.file.write(bytes([len(name)]) + name)
+
+    def record(self, tick, player_id, direction, nitro):
+        """
+        :param tick: number of ticks played before the command
+        """
+        self.file.write(COMMAND.pack(tick, player_id, encode_command(direction, nitro)))
+
+    def close(self, tick):
+        """
+        Write the tick the match stopped at and close the file
+        """
+        if not self.file.closed:
+            self.file.write(COMMAND.pack(tick, END, 0))
+            self.file.close()
+
+
+class Replay:
+    """
+    Recorded match: options of GameScene, commands of every tick and the tick the recording stopped at
+    """
+
+    def __init__(self, options, commands, end_tick=None):
+        """
+        :param options: keyword arguments of GameScene: seed, game_mode, players_count, width, height and bots
+        :param commands: {tick: [(player id, (direction, nitro)), ...]} in the order they were applied
+        :param end_tick: None if the recording was cut short
+        """
+        self.options = options
+        self.commands = commands
+        self.end_tick = end_tick
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as replay:
+            data = replay.read()
+        magic, version, seed, game_mode, players_count, width, height = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a replay of version {VERSION}")
+        offset = HEADER.size
+        bots = data[offset + 1:offset + 1 + data[offset]].decode() or None
+        offset += 1 + data[offset]
+
+        commands, end_tick = {}, None
+        # the last record may be cut short if the recording was interrupted
+        records = data[offset:offset + (len(data) - offset) // COMMAND.size * COMMAND.size]
+        for tick, player_id, code in COMMAND.iter_unpack(records):
+            if player_id == END:
+                end_tick = tick
+                break
+            commands.setdefault(tick, []).append((player_id, decode_command(code)))
+        options = {'seed': seed, 'game_mode': GAME_MODES[game_mode], 'players_count': players_count,
+                   'width': width, 'height': height, 'bots': bots}
+        return cls(options, commands, end_tick)
+
+    def apply(self, scene):
+        """
+        Apply the commands recorded before the current tick of the scene
+        """
+        for player_id, command in self.commands.get(scene.tick, ()):
+            scene.apply_commands({player_id: command})
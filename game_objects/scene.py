@@ -1,21 +1,35 @@
+import math
+import os
 import random
-import copy
+import time
+from collections import Counter
 from typing import Dict, List
 
+import numpy as np
 import pygame
-import pygame.freetype
 
 from game_objects.player import Player, Player2
 from game_objects.bonuses import Bonus, Nitro, ExtraLife
 from game_objects.territory import Territory
+from game_objects.board import Board
+from game_objects.board_surface import BoardSurface, blend_with_white
+from game_objects.bots import BOTS, DIRECTIONS, KEEP, Controller, Observations
+from game_objects.delta import TickDelta
+from game_objects.head_up_display import HeadUpDisplay
+from game_objects.profiler import TickProfiler
+from game_objects.replay import ReplayRecorder
+from game_objects.snapshot import BONUS_TYPES, take_snapshot, restore_snapshot
+from game_objects.sprites import SpriteAtlas, get_sprite
 from config import CONSTS
-from helpers import DrawableObj, get_random_coordinates, generate_coordinates
+from helpers import DrawableObj, get_random_coordinates, generate_coordinates, draw_grid_lines, render_text
 
 
 class SceneBase:
     def __init__(self, screen):
         self.screen = screen
         self.next_scene = self
+        # whole screen has to be repainted on the next render
+        self.redraw_all = True
 
     def process_input(self, events, pressed_keys):
         NotImplementedError("uh-oh, you didn't override this in the child class")
@@ -23,9 +37,16 @@ class SceneBase:
     def update(self):
         NotImplementedError("uh-oh, you didn't override this in the child class")
 
-    def render(self):
+    def render(self, alpha=1.0):
+        """
+        :param alpha: part of the tick passed since the last update, from 0 to 1
+        :return: rectangles of the screen changed since the last frame, None if the whole screen changed
+        """
         NotImplementedError("uh-oh, you didn't override this in the child class")
 
+    def invalidate(self):
+        self.redraw_all = True
+
     def switch2scene(self, next_scene):
         self.next_scene = next_scene
 
@@ -34,16 +55,17 @@ class SceneBase:
 
 
 class Cell(DrawableObj):
-    def __init__(self, screen, pos=(0, 0), color=(0, 0, 0, 255), image_name=None):
+    def __init__(self, screen, pos=(0, 0), color=(0, 0, 0, 255), image_name=None, dirty_cells=None):
         super().__init__(screen)
+        # set of cells to repaint on the next frame, the cell adds itself when its color changes
+        self.dirty_cells = dirty_cells
         self.color = color
         self.prev_color = color
-        self.image_name = image_name
-        if image_name is not None:
-            self.block = pygame.transform.scale(CONSTS.IMAGES[image_name], (CONSTS.WIDTH, CONSTS.HEIGHT))
-        else:
-            self.block = pygame.Surface((CONSTS.WIDTH, CONSTS.HEIGHT), pygame.SRCALPHA)
+        self.block = pygame.Surface((CONSTS.WIDTH, CONSTS.HEIGHT), pygame.SRCALPHA)
         self.block.set_colorkey(CONSTS.BLACK)
+        self.image = None  # sprite drawn over the color
+        if image_name is not None:
+            self.change_image(image_name)
         self.rect = self.block.get_rect()
         self.rect.topleft = pos
         self.pos = pos
@@ -51,20 +73,31 @@ class Cell(DrawableObj):
     def draw(self):
         pygame.draw.rect(self.block, self.color, self.block.get_rect())
         self.screen.blit(self.block, self.rect)
+        if self.image is not None:
+            self.screen.blit(self.image, self.rect)
 
     def change_color(self, new_color):
+        if self.dirty_cells is not None and tuple(new_color) != tuple(self.color):
+            self.dirty_cells.add(self)
         self.color = new_color
 
     def change_image(self, image_name):
-        self.block = pygame.transform.scale(CONSTS.IMAGES[image_name], (CONSTS.WIDTH, CONSTS.HEIGHT))
-        self.block.set_colorkey(CONSTS.BLACK)
-        self.rect = self.block.get_rect()
+        """
+        :param image_name: name of the sprite drawn over the color, None for none
+        """
+        if self.dirty_cells is not None:
+            self.dirty_cells.add(self)
+        self.image = None if image_name is None else get_sprite(image_name, (CONSTS.WIDTH, CONSTS.HEIGHT))
 
 
 class StartScene(SceneBase):
-    def __init__(self, screen, text, pos, color=(255, 255, 255, 255)):
+    def __init__(self, screen, text, pos, color=(255, 255, 255, 255), game_options=None):
+        """
+        :param game_options: renderer, players_count, width, height, bots and record_dir of the started GameScene
+        """
         SceneBase.__init__(self, screen)
         self.text = text
+        self.game_options = game_options if game_options is not None else {}
 
         self.fontname = None
         self.headfontsize = 72
@@ -79,10 +112,10 @@ class StartScene(SceneBase):
         for event in events:
             if event.type == pygame.KEYDOWN and event.key == pygame.K_1:
                 # Move to the next scene when the user pressed Enter
-                self.switch2scene(GameScene(self.screen, game_mode='classic'))
+                self.switch2scene(GameScene(self.screen, game_mode='classic', **self.game_options))
             elif event.type == pygame.KEYDOWN and event.key == pygame.K_2:
                 # Move to the next scene when the user pressed Enter
-                self.switch2scene(GameScene(self.screen, game_mode='timeLIMIT'))
+                self.switch2scene(GameScene(self.screen, game_mode='timeLIMIT', **self.game_options))
 
             elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                 self.scene_status['status'] = 'endgame'
@@ -90,34 +123,26 @@ class StartScene(SceneBase):
     def update(self):
         return self.scene_status
 
-    def render(self):
+    def render(self, alpha=1.0):
+        # nothing moves on the menu, it is drawn only when the whole screen has to be repainted
+        if not self.redraw_all:
+            return []
+        self.redraw_all = False
+
         pygame.draw.rect(self.background, self.background_color, self.background.get_rect())
         self.screen.blit(self.background, self.background.get_rect())
-        font = pygame.font.Font(self.fontname, self.headfontsize)
-        img = font.render(self.text, True, self.fontcolor)
-        rect = img.get_rect()
-        rect.center = self.pos
-        self.screen.blit(img, rect)
-
-        font = pygame.font.Font(self.fontname, 42)
-        img = font.render('Press 1 to start Classic Mode', True, self.fontcolor)
-        rect = img.get_rect()
-        rect.center = [self.pos[0], self.pos[1] + self.headfontsize]
-        self.screen.blit(img, rect)
-
-        font = pygame.font.Font(self.fontname, 42)
-        img = font.render('Press 2 to start TimeLimit Mode', True, self.fontcolor)
-        rect = img.get_rect()
-        rect.center = [self.pos[0], self.pos[1] + self.headfontsize + 42]
-        self.screen.blit(img, rect)
+        for text, size, y in ((self.text, self.headfontsize, self.pos[1]),
+                              ('Press 1 to start Classic Mode', 42, self.pos[1] + self.headfontsize),
+                              ('Press 2 to start TimeLimit Mode', 42, self.pos[1] + self.headfontsize + 42)):
+            img = render_text(text, size, tuple(self.fontcolor), self.fontname)
+            self.screen.blit(img, img.get_rect(center=(self.pos[0], y)))
+        return None
 
 
 class EndGameScene(StartScene):
-    def __init__(self, screen, text, pos, color=(255, 255, 255, 255), players=None):
-        super().__init__(screen, text, pos, color)
+    def __init__(self, screen, text, pos, color=(255, 255, 255, 255), players=None, game_options=None):
+        super().__init__(screen, text, pos, color, game_options)
         self.fontsize = 32
-        pygame.freetype.init()
-        self.font = pygame.freetype.Font(None, self.fontsize)
         self.players = players if players is not None else []
 
     def process_input(self, events, pressed_keys):
@@ -125,60 +150,77 @@ class EndGameScene(StartScene):
             if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                 self.switch2scene(StartScene(self.screen,
                                              'Grab The Map',
-                                             pos=(CONSTS.WINDOW_WIDTH // 2, CONSTS.GRID_HEIGHT // 2)))
+                                             pos=(CONSTS.WINDOW_WIDTH // 2, CONSTS.GRID_HEIGHT // 2),
+                                             game_options=self.game_options))
 
     def update(self):
         return self.scene_status
 
-    def render(self):
-        self.font.render_to(self.screen,
-                            (10, CONSTS.WINDOW_HEIGHT - (2 * self.fontsize)),
-                            "Press Esc - open Start Page",
-                            CONSTS.BLACK,
-                            None, size=self.fontsize//2)
-
-        self.font.render_to(self.screen,
-                            (10, 4),
-                            "SCORES",
-                            CONSTS.BLACK,
-                            None, size=self.headfontsize)
-        for i, player in enumerate(self.players):
+    def render(self, alpha=1.0):
+        # the scores don't change any more, they are drawn only when the whole screen has to be repainted
+        if not self.redraw_all:
+            return []
+        self.redraw_all = False
+
+        self.screen.blit(render_text("Press Esc - open Start Page", self.fontsize // 2, CONSTS.BLACK, freetype=True),
+                         (10, CONSTS.WINDOW_HEIGHT - (2 * self.fontsize)))
+        self.screen.blit(render_text("SCORES", self.headfontsize, CONSTS.BLACK, freetype=True), (10, 4))
+        rows = (CONSTS.WINDOW_HEIGHT - 2 * self.fontsize - self.headfontsize - 4) // self.fontsize
+        for i, player in enumerate(self.players[:rows]):
             if i == 0 and player.score > 0:
-                self.font.render_to(self.screen,
-                                    (10, self.headfontsize + 4 + i * self.fontsize),
-                                    f"{player.name}: {int(player.score)}",
-                                    CONSTS.GOLD,
-                                    None, size=self.fontsize+2)
+                color, size = CONSTS.GOLD, self.fontsize + 2
             else:
-                self.font.render_to(self.screen,
-                                    (10, self.headfontsize + 4 + i * self.fontsize),
-                                    f"{player.name}: {int(player.score)}",
-                                    CONSTS.BLACK,
-                                    None, size=self.fontsize)
+                color, size = CONSTS.BLACK, self.fontsize
+            self.screen.blit(render_text(f"{player.name}: {int(player.score)}", size, color, freetype=True),
+                             (10, self.headfontsize + 4 + i * self.fontsize))
+        return None
 
 
 class Grid(DrawableObj):
     def __init__(self, screen):
         super().__init__(screen)
+        self.dirty_cells = set()
         self.grid = [[Cell(self.screen,
                            pos=(j, i),
-                           color=CONSTS.EMPTY_CELL_COLOR
+                           color=CONSTS.EMPTY_CELL_COLOR,
+                           dirty_cells=self.dirty_cells
                            ) for j in range(0, CONSTS.GRID_WIDTH, CONSTS.WIDTH)]
                      for i in range(0, CONSTS.GRID_HEIGHT, CONSTS.HEIGHT)]
 
+        # grid lines are drawn once and blitted over the repainted cells
+        self.lines_key_color = (255, 0, 255)
+        self.lines = pygame.Surface((CONSTS.GRID_WIDTH + 2, CONSTS.GRID_HEIGHT + 2))
+        self.lines.fill(self.lines_key_color)
+        self.draw_grid_lines(self.lines)
+        self.lines.set_colorkey(self.lines_key_color)
+
     def draw(self):
+        """
+        Repaint every cell
+        """
         for row in self.grid:
             for cell in row:
                 cell.draw()
-        self.draw_grid_lines()
+        self.screen.blit(self.lines, (0, 0))
+        self.dirty_cells.clear()
+
+    def draw_dirty(self):
+        """
+        Repaint the cells which changed color since the last frame
+        :return: rectangles of the repainted cells
+        """
+        rects = []
+        for cell in self.dirty_cells:
+            self.screen.fill(CONSTS.WHITE, cell.rect)
+            cell.draw()
+            self.screen.blit(self.lines, cell.rect, area=cell.rect)
+            rects.append(cell.rect)
+        self.dirty_cells.clear()
+        return rects
 
-    def draw_grid_lines(self):
-        for y in range(0, CONSTS.GRID_HEIGHT+1, CONSTS.HEIGHT):
-            line_width = 3 if y == 0 or y == CONSTS.GRID_HEIGHT else 1
-            pygame.draw.line(self.screen, CONSTS.GRID_LINE_COLOR, (0, y), (CONSTS.GRID_WIDTH, y), width=line_width)
-        for x in range(0, CONSTS.GRID_WIDTH+1, CONSTS.WIDTH):
-            line_width = 3 if x == 0 or x == CONSTS.GRID_WIDTH else 1
-            pygame.draw.line(self.screen, CONSTS.GRID_LINE_COLOR, (x, 0), (x, CONSTS.GRID_HEIGHT), width=line_width)
+    @staticmethod
+    def draw_grid_lines(surface):
+        draw_grid_lines(surface, (CONSTS.GRID_WIDTH, CONSTS.GRID_HEIGHT), (CONSTS.WIDTH, CONSTS.HEIGHT))
 
     def __getitem__(self, pos):
         x, y = pos
@@ -190,132 +232,362 @@ class Grid(DrawableObj):
 
 
 class GameScene(SceneBase):
-    def __init__(self, screen, game_mode='classic'):
+    def __init__(self, screen, game_mode='classic', renderer=CONSTS.RENDERER, players_count=2,
+                 width=CONSTS.X_CELLS_COUNT, height=CONSTS.Y_CELLS_COUNT, bots=None, seed=None, record_dir=None):
+        """
+        :param screen: surface to draw on, None to simulate the game headless, without any rendering
+        :param renderer: 'cells' to draw every cell as a separate surface,
+                         'surface' to draw the whole board from a pixel array
+        :param players_count: number of players, the first two are controlled from the keyboard
+        :param width: number of cells in a row of the board, boards of other than the default size
+                      are always drawn by the 'surface' renderer
+        :param height: number of cells in a column of the board
+        :param bots: Controller of the players beyond the first two or the name of one of the reference BOTS,
+                     None to leave them to apply_commands. Other players get controllers through self.controllers
+        :param seed: seed of the match, spawns, bonuses and bots depend only on it and on the applied commands
+        :param record_dir: directory to record the match to, see game_objects.replay. Only matches of the reference
+                           bots can be recorded
+        """
         SceneBase.__init__(self, screen)
         self.game_mode = game_mode
+        self.game_options = {'renderer': renderer, 'players_count': players_count, 'width': width, 'height': height,
+                             'bots': bots, 'record_dir': record_dir}
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.rng = random.Random(self.seed)
         self.tick = 0
+        self.updating = False  # the scene is in the middle of an update
         self.max_ticks = CONSTS.MAX_TICK_COUNT if game_mode != 'classic' else None
-        self.grid = Grid(screen)
+        self.board = Board(width, height)
+        if not 1 <= players_count < self.board.areas.size:
+            raise ValueError(f"players_count must be from 1 to {self.board.areas.size - 1}, got {players_count}")
+        self.headless = screen is None
+        if (width, height) != (CONSTS.X_CELLS_COUNT, CONSTS.Y_CELLS_COUNT):
+            renderer = 'surface'
+        self.renderer = None if self.headless else renderer
+        self.grid = None
+        # cells under the heads drawn on the last frame
+        self.head_cells = set()
+        if self.renderer == 'surface':
+            self.board_surface = BoardSurface(screen, self.board)
+        elif self.renderer == 'cells':
+            self.grid = Grid(screen)
+            self.bonus_sprites = SpriteAtlas({bonus.sprite: bonus.color for bonus in BONUS_TYPES},
+                                             (CONSTS.WIDTH, CONSTS.HEIGHT))
         self.available_bonuses = [Nitro]
         self.bonuses: List[Bonus] = []
         self.players = [Player(1, 'player1',
-                               get_random_coordinates(),
-                               CONSTS.PLAYER_COLORS[0])]
-        self.players.append(Player2(2, 'player2',
-                            generate_coordinates(self.players, self.get_busy_points()),
-                            CONSTS.PLAYER_COLORS[1]))
+                               get_random_coordinates(width, height, self.rng),
+                               CONSTS.PLAYER_COLORS[0],
+                               self.board)]
+        for player_id in range(2, players_count + 1):
+            player_class = Player2 if player_id == 2 else Player
+            position = generate_coordinates(self.players, self.board, self.rng)
+            if position is None:
+                raise ValueError(f"no room for {players_count} players on a {width}x{height} board")
+            self.players.append(player_class(player_id, f'player{player_id}',
+                                position,
+                                CONSTS.PLAYER_COLORS[(player_id - 1) % len(CONSTS.PLAYER_COLORS)],
+                                self.board))
+
+        # controller of every player driven by a bot: {player id: Controller}
+        self.controllers = {}
+        if bots is not None:
+            if isinstance(bots, Controller):
+                controller = bots
+            else:
+                controller = BOTS[bots](np.random.default_rng(self.rng.getrandbits(64)))
+            self.controllers.update({p.id: controller for p in self.players[2:]})
+
+        self.recorder = None
+        if record_dir is not None:
+            if isinstance(bots, Controller):
+                raise ValueError("only matches of the reference bots can be recorded")
+            path = os.path.join(record_dir, time.strftime(f'match_%Y%m%d_%H%M%S_{self.seed}.replay'))
+            self.recorder = ReplayRecorder(path, self.seed, game_mode, players_count, width, height, bots)
 
         self.losers = []
         self.scene_status = {
             "status": 'game'
         }
-
-        # text part
-        self.fontname = None
+        self.profiler = TickProfiler()
+        # changes made by the last update, see TickDelta
+        self.delta = TickDelta(self.tick, resync=True)
+        # the delta of the next update is a resync too, it doesn't follow any state the clients have
+        self.resync = True
+
+        if not self.headless:
+            self.__init_text()
+        if self.grid is not None:
+            self.__paint_cells(self.board.get_points(p.id) for p in self.players)
+
+    def __init_text(self):
         self.headfontsize = 23
         self.fontsize = 18
-        self.fontcolor = pygame.Color('black')
-        pygame.freetype.init()
-        self.font = pygame.freetype.Font(None, self.fontsize)
+        # texts of the scores panel on the last frame and the tick they were made on
+        self.panel_texts = None
+        self.panel_tick = None
+        self.panel_hud_content = None  # profiler overlay drawn over the panel on the last frame
+        # scores panel to the right of the grid, repainted when its texts change
+        self.panel_rect = pygame.Rect(CONSTS.GRID_WIDTH + 2, 0,
+                                      CONSTS.WINDOW_WIDTH - CONSTS.GRID_WIDTH - 2, CONSTS.WINDOW_HEIGHT)
+        pygame.font.init()
+        self.hud = HeadUpDisplay(self.screen)
 
     def process_input(self, events, pressed_keys):
+        for event in events:
+            if event.type == pygame.KEYDOWN and event.key == CONSTS.PROFILER_OVERLAY:
+                self.hud.toggle()
+            elif event.type == pygame.KEYDOWN and event.key == CONSTS.PROFILER_DUMP:
+                self.profiler.dump(time.strftime('tick_profile_%Y%m%d_%H%M%S.csv'))
+
+        # keys are turned into commands, so they are recorded like any other commands
         for player in self.players:
+            directions = {key: direction for direction, key in player.move_commands.items()}
             for event in events:
                 if event.type == pygame.KEYUP:
                     if event.key in player.extra_commands.values():
-                        player.nitro(activate=False)
+                        self.apply_commands({player.id: (None, False)})
                 if event.type == pygame.KEYDOWN:
-                    if event.key in player.move_commands.values():
-                        player.change_direction(event.key)
+                    if event.key in directions:
+                        self.apply_commands({player.id: (directions[event.key], None)})
                     if event.key in player.extra_commands.values():
-                        player.nitro(activate=True)
+                        self.apply_commands({player.id: (None, True)})
+
+    def apply_commands(self, commands):
+        """
+        Programmatic counterpart of process_input
+        :param commands: {player id: (direction, nitro)}, where direction is 'up', 'down', 'left', 'right'
+                         or None to keep it, nitro is True to activate, False to cancel or None to keep it
+        """
+        for player in self.players:
+            if player.id in commands:
+                direction, nitro = commands[player.id]
+                if self.recorder is not None:
+                    self.recorder.record(self.tick, player.id, direction, nitro)
+                if direction is not None:
+                    player.change_direction(player.move_commands[direction])
+                if nitro is not None:
+                    player.nitro(activate=nitro)
+
+    def __apply_bots(self):
+        """
+        Ask every controller once for the directions of all of its players
+        """
+        groups = {}
+        for player in self.players:
+            if player.id in self.controllers:
+                groups.setdefault(self.controllers[player.id], []).append(player)
+        if not groups:
+            return
+        # players of a controller are observed next to each other, so it gets views of the shared arrays
+        players = [player for group in groups.values() for player in group]
+        observations = Observations.observe(players, self.board)
+        start = 0
+        for controller, group in groups.items():
+            decisions = controller.decide(observations[start:start + len(group)])
+            for player, decision in zip(group, decisions.tolist()):
+                if decision != KEEP:
+                    player.change_direction(player.move_commands[DIRECTIONS[decision]])
+            start += len(group)
 
     @staticmethod
     def collision_resolution(players_grabs: Dict[Player, set]):
-        pg = {player: grab for player, grab in players_grabs.items() if not player.is_eaten(players_grabs)[0]}
-        res_pg = {player: copy.copy(grab) for player, grab in pg.items()}
-        for player1, captured1 in pg.items():
-            for player2, captured2 in pg.items():
-                if player1 != player2:
-                    res_pg[player1].difference_update(captured2)  # remove captured2 from first players grabs
-        return res_pg
+        """
+        Drop the grabs of players eaten by others and the points grabbed by more than one of the rest
+        :param players_grabs: points captured by every player in this tick
+        :return: points every player which isn't eaten captures alone
+        """
+        claims = Counter()
+        for grab in players_grabs.values():
+            claims.update(grab)
+
+        # a player is eaten if somebody else grabbed its head, its grab doesn't count
+        pg = {player: grab for player, grab in players_grabs.items()
+              if claims[player.get_position()] <= (player.get_position() in grab)}
+        for player, grab in players_grabs.items():
+            if player not in pg:
+                claims.subtract(grab)
+        return {player: {point for point in grab if claims[point] == 1} for player, grab in pg.items()}
 
     @staticmethod
-    def is_player_lose(player: Player, players: List[Player]):
+    def get_heads(players: List[Player]):
+        """
+        :return: {position: players with the head there}
+        """
+        heads = {}
+        for p in players:
+            heads.setdefault((p.x, p.y), []).append(p)
+        return heads
+
+    @staticmethod
+    def get_line_crossings(heads):
+        """
+        Look up the lines under every head in the lines registry of the board
+        :param heads: positions of the heads from get_heads
+        :return: {player: players with the head on its line before the last point}
+        """
+        crossings = {}
+        for position, players in heads.items():
+            for owner in players[0].territory.board.lines.get(position, ()):
+                if owner.line_points.is_crossed_at(position):
+                    crossings.setdefault(owner, []).extend(players)
+        return crossings
+
+    @staticmethod
+    def is_player_lose(player: Player, players: List[Player], heads=None, crossings=None):
+        """
+        :param heads: positions of the players' heads from get_heads, built from the players if not given
+        :param crossings: lines crossed by the heads from get_line_crossings, built from the heads if not given
+        """
+        heads = heads if heads is not None else GameScene.get_heads(players)
+        crossings = crossings if crossings is not None else GameScene.get_line_crossings(heads)
         is_lose = False
 
-        # cross the line
-        if (player.x, player.y) in player.line_points[:-1]:
+        # line crossed by the player himself or by other player
+        for p in crossings.get(player, ()):
+            if p != player:
+                p.tick_score += CONSTS.LINE_KILL_SCORE
             is_lose = True
 
-        # line crossed by other player
-        for p in players:
-            if (p.x, p.y) in player.line_points[:-1]:
-                if p != player:
-                    p.tick_score += CONSTS.LINE_KILL_SCORE
-                is_lose = True
-
         # if player.extra_life and is_lose:
         #     is_lose = False
         #     player.extra_life = False
         #     player.bonuses.remove([b for b in player.bonuses if b.name == 'extra_life'][0])
 
         # face the boarder
-        if player.y < 0 or player.y >= CONSTS.Y_CELLS_COUNT or player.x < 0 or player.x >= CONSTS.X_CELLS_COUNT:
+        if not player.territory.board.in_bounds((player.x, player.y)):
             is_lose = True
 
         # faced with other player
-        for p in players:
-            if (player.x, player.y) == (p.x, p.y) and p != player:
+        for p in heads.get((player.x, player.y), ()):
+            if p != player:
                 if len(player.line_points) >= len(p.line_points):  # win player with longer line
                     is_lose = True
 
         # if player lost his territory
-        if len(player.territory.points) == 0:
+        if player.territory.area == 0:
             is_lose = True
 
         return is_lose
 
     def __clear_board_from_loser(self, player: Player):
-        # clear the head and line points
-        for row in self.grid.grid:
-            for cell in row:
-                if cell.color == player.color:
-                    cell.change_color(CONSTS.EMPTY_CELL_COLOR)
-        try:
-            for point in player.line_points[:]:
-                self.grid[point].change_color(CONSTS.EMPTY_CELL_COLOR)
-        except:
-            for point in player.line_points[:-1]:
-                self.grid[point].change_color(CONSTS.EMPTY_CELL_COLOR)
-
-        # clear territory
-        for point in player.territory.points:
-            self.grid[point].change_color(CONSTS.EMPTY_CELL_COLOR)
+        if self.grid is not None:
+            # the head is erased with the other heads on the next frame
+            self.__paint_cells([player.line_points])
+        # the points leave the lines registry and are recorded as removed to the delta of the tick
+        player.line_points.clear()
+
+    def __add_loser(self, player: Player):
+        """
+        Put the player to the losers and clear its line, only once per tick, its territory is released when it
+        leaves the players
+        """
+        if player not in self.losers:
+            self.losers.append(player)
+            self.delta.losers.append(player.id)
+            self.__clear_board_from_loser(player)
 
     def update(self):
+        self.profiler.start(self.tick + 1)
+        self.updating = True
+        self.delta = self.board.delta = TickDelta(self.tick + 1, resync=self.resync)
+        self.resync = False
         status = self.__update_scene_status()
+        self.profiler.mark('status')
         self.__update()
+        self.board.delta = None
+        if self.grid is not None:
+            self.__paint_cells([self.delta.get_points()])
+            self.profiler.mark('rendering')
+        self.updating = False
         return status
 
-    def render(self):
-        for player in self.players:
-            self.__draw_player_territory(player)
+    def snapshot(self):
+        """
+        :return: Snapshot of the simulation state, a few arrays which don't depend on the rendering
+        """
+        return take_snapshot(self)
+
+    def restore(self, snapshot):
+        """
+        Bring the match back to a snapshot of this scene or of a scene with the same options.
+        The recording, if any, isn't rolled back.
+        """
+        restore_snapshot(self, snapshot)
+        self.next_scene = self
+        self.scene_status['status'] = 'game'
+        self.delta = TickDelta(self.tick, resync=True)
+        self.resync = True
+        if self.grid is not None:
+            for row in self.grid.grid:
+                for cell in row:
+                    cell.color = cell.prev_color = CONSTS.EMPTY_CELL_COLOR
+            self.__paint_cells(self.board.get_points(p.id) for p in self.players)
+        self.head_cells.clear()
+        self.invalidate()
+
+    def switch2scene(self, next_scene):
+        # the match is over whatever comes next, an update which switches the scene is still played to the end
+        self.finish_recording(self.tick + 1 if self.updating else self.tick)
+        super().switch2scene(next_scene)
+
+    def finish_recording(self, tick=None):
+        """
+        :param tick: number of ticks the match took, the current tick if not given
+        """
+        if self.recorder is not None:
+            self.recorder.close(self.tick if tick is None else tick)
+
+    def render(self, alpha=1.0):
+        if self.headless:
+            return None
+
+        self.profiler.resume()
+        dirty_rects = self.__render(alpha)
+        self.profiler.mark('rendering')
+        return dirty_rects
+
+    def __render(self, alpha):
+        if self.renderer == 'surface':
+            panel_rects = self.__draw_panel()
+            board_rect = self.board_surface.draw(self.players, self.bonuses, alpha)
+            if self.redraw_all:
+                self.redraw_all = False
+                return None
+            return [board_rect] + panel_rects
+
+        # heads of the last frame are erased by repainting the cells under them
+        self.grid.dirty_cells.update(self.grid[cell] for cell in self.head_cells)
         for player in self.players:
-            self.__draw_player_head(player)
             self.__draw_player_line(player)
         self.__draw_bonuses()
-        self.__draw_text()
-        self.grid.draw()
+
+        if self.redraw_all:
+            self.__draw_panel()
+            self.grid.draw()
+            self.__draw_bonus_icons(self.bonuses)
+            self.__draw_heads(alpha)
+            self.redraw_all = False
+            return None
+
+        # an icon stays on the screen until the cell under it is repainted
+        repainted = [bonus for bonus in self.bonuses if self.grid[bonus.x, bonus.y] in self.grid.dirty_cells]
+        return (self.grid.draw_dirty() + self.__draw_bonus_icons(repainted) + self.__draw_heads(alpha) +
+                self.__draw_panel())
 
     def __update(self):
         self.tick += 1
         for player in self.players:
             player.tick += 1
+        self.__apply_bots()
+        self.profiler.mark('bots')
+
         # move players
         for player in self.players:
             if player.tick % player.moveable_tick == 0:
                 player.move()
+                self.delta.heads[player.id] = player.get_position()
+        self.profiler.mark('movement')
 
         # count captured territories
         players_grabs = {}
@@ -327,23 +599,25 @@ class GameScene(SceneBase):
                 if len(captured) > 0:
                     player.line_points.clear()
                     player.tick_score += CONSTS.NEUTRAL_TERRITORY_SCORE * len(captured)
+        self.profiler.mark('capture')
 
         # catch losers
-        for player in self.players:
-            is_lose = self.is_player_lose(player, self.players)
-            if is_lose:
-                self.losers.append(player)
-                self.__clear_board_from_loser(player)
+        heads = self.get_heads(self.players)
+        crossings = self.get_line_crossings(heads)
+        # all losers are found before their lines are cleared, head-on collisions compare the line lengths
+        for player in [p for p in self.players if self.is_player_lose(p, self.players, heads, crossings)]:
+            self.__add_loser(player)
+        self.profiler.mark('losers')
 
         # collision resolving
         players_grabs = self.collision_resolution(players_grabs)
 
-        # update losers list
+        # update losers list, a player is eaten if its head is in a grab of another player
+        grabbed_by = {point: p for p, grab in players_grabs.items() for point in grab}
         for player in self.players:
-            is_lose, p = player.is_eaten(players_grabs)
-            if is_lose:
-                self.losers.append(player)
-                self.__clear_board_from_loser(player)
+            if grabbed_by.get(player.get_position(), player) != player:
+                self.__add_loser(player)
+        self.profiler.mark('collisions')
 
         # update territories
         for player in self.players:
@@ -355,33 +629,41 @@ class GameScene(SceneBase):
                 if bonus.is_eaten(player, captured):
                     bonus.apply(player)
                     self.bonuses.remove(bonus)
+                    self.board.spawn_cells.unblock_point((bonus.x, bonus.y))
+                    self.delta.bonuses_taken.append((player.id, bonus))
 
             if captured:
-                player.territory.points.update(captured)
-                for p in self.players:
-                    if p != player:
-                        removed = p.territory.remove_points(captured)
-                        player.tick_score += \
-                            (CONSTS.ENEMY_TERRITORY_SCORE - CONSTS.NEUTRAL_TERRITORY_SCORE) * len(removed)
+                player.captures += 1
+                removed = player.territory.add_points(captured)
+                player.tick_score += \
+                    (CONSTS.ENEMY_TERRITORY_SCORE - CONSTS.NEUTRAL_TERRITORY_SCORE) * len(removed)
 
         # remove losers from players list
         for player in self.losers:
             if player in self.players:
                 self.players.remove(player)
-                self.__clear_board_from_loser(player)
+                # the territory is released only now, the cells other players captured from it in this tick
+                # are scored as enemy territory; the released cells are repainted with the changes of the tick
+                player.territory.points.clear()
 
         # update players scores
         for player in self.players:
             player.score += player.tick_score
             player.tick_score = 0
+        self.profiler.mark('territories')
 
         self.generate_bonus()
+        self.profiler.mark('bonuses')
 
         if self.game_mode == 'timeLIMIT':
-            for player in self.losers:
-                player.x, player.y = generate_coordinates(self.players, self.get_busy_points())
+            for player in self.losers[:]:
+                position = generate_coordinates(self.players, self.board, self.rng)
+                if position is None:
+                    continue  # no room to respawn, the player waits for the next tick
+                player.x, player.y = player.prev_x, player.prev_y = position
+                self.delta.heads[player.id] = position
                 player.score //= 2
-                player.territory = Territory(player.x, player.y, player.territory_color)
+                player.territory = Territory(player.x, player.y, player.territory_color, self.board, player.id)
                 player.line_points.clear()
                 self.players.append(player)
                 self.losers.remove(player)
@@ -389,55 +671,112 @@ class GameScene(SceneBase):
         if self.max_ticks is not None and self.tick >= self.max_ticks:
             self.losers += self.players
             self.players = []
-
-    def __draw_player_territory(self, player):
-        for point in player.territory.points:
-            self.grid[point].change_color(player.territory.color)
-            self.grid[point].prev_color = player.territory.color
+        self.profiler.mark('respawn')
+
+    def __paint_cells(self, groups):
+        """
+        Paint the grid cells of the points with the territory colors of their owners
+        :param groups: iterable of iterables of points, points out of the board are skipped
+        """
+        colors = {p.id: p.territory.color for p in self.players + self.losers}
+        colors[Board.FREE] = CONSTS.EMPTY_CELL_COLOR
+        for points in groups:
+            for point in points:
+                if self.board.in_bounds(point):
+                    cell = self.grid[point]
+                    cell.change_color(colors[self.board.owner_of(point)])
+                    cell.prev_color = cell.color
 
     def __draw_player_line(self, player):
         for point in player.line_points:
             if point != (player.x, player.y):
                 self.grid[point].change_color(player.line_color)
 
-    def __draw_player_head(self, player):
-        if player.prev_x is not None:
-            self.grid[player.prev_x, player.prev_y].change_color(self.grid[player.prev_x, player.prev_y].prev_color)
-        self.grid[player.x, player.y].change_color(player.color)
+    def __draw_heads(self, alpha):
+        """
+        Draw the heads over the grid on their way between the last two cells
+        :return: rectangles of the heads
+        """
+        self.head_cells.clear()
+        rects = []
+        for player in self.players:
+            x, y = player.get_drawn_position(alpha)
+            rect = pygame.Rect(round(x * CONSTS.WIDTH), round(y * CONSTS.HEIGHT), CONSTS.WIDTH, CONSTS.HEIGHT)
+            self.screen.fill(blend_with_white(tuple(player.color)), rect)
+            self.screen.blit(self.grid.lines, rect, area=rect)
+            rects.append(rect)
+            self.head_cells.update({(math.floor(x), math.floor(y)), (math.ceil(x), math.ceil(y))})
+        return rects
 
     def __draw_bonuses(self):
         for bonus in self.bonuses:
             self.grid[bonus.x, bonus.y].change_color(bonus.color)
 
-    def __draw_text(self, ):
-        self.font.render_to(self.screen,
-                            (CONSTS.GRID_WIDTH + 5, 4),
-                            "Players scores:",
-                            CONSTS.BLACK,
-                            None, size=self.headfontsize)
-        for i, player in enumerate(sorted(self.players + self.losers, key=lambda x: x.score)[::-1]):
-            color = CONSTS.BLACK if player in self.players else CONSTS.RED
-            self.font.render_to(self.screen,
-                                (CONSTS.GRID_WIDTH + 5, self.headfontsize + 4 + i * self.fontsize),
-                                f"{player.name}: {int(player.score)}",
-                                color,
-                                None, size=self.fontsize)
+    def __draw_bonus_icons(self, bonuses):
+        """
+        :return: rectangles of the icons
+        """
+        rects = []
+        for bonus in bonuses:
+            rect = self.bonus_sprites.blit(self.screen, bonus.sprite, self.grid[bonus.x, bonus.y].rect)
+            self.screen.blit(self.grid.lines, rect, area=rect)
+            rects.append(rect)
+        return rects
+
+    def __get_panel_texts(self):
+        """
+        :return: text, position, color and size of every line of the scores panel
+        """
+        texts = [("Players scores:", (CONSTS.GRID_WIDTH + 5, 4), CONSTS.BLACK, self.headfontsize)]
+        # only the best players fit into the panel
+        rows = (CONSTS.WINDOW_HEIGHT - 20 - self.headfontsize - 4) // self.fontsize
+        alive = set(self.players)
+        for i, player in enumerate(sorted(self.players + self.losers, key=lambda x: x.score)[::-1][:rows]):
+            color = CONSTS.BLACK if player in alive else CONSTS.RED
+            texts.append((f"{player.name}: {int(player.score)}",
+                          (CONSTS.GRID_WIDTH + 5, self.headfontsize + 4 + i * self.fontsize), color, self.fontsize))
 
         if self.game_mode == 'timeLIMIT':
-            self.font.render_to(self.screen,
-                                (CONSTS.GRID_WIDTH + 5, CONSTS.WINDOW_HEIGHT - 20),
-                                f"Ticks left: {self.max_ticks - self.tick}",
-                                CONSTS.BLACK,
-                                None, size=self.fontsize)
+            texts.append((f"Ticks left: {self.max_ticks - self.tick}", (CONSTS.GRID_WIDTH + 5, CONSTS.WINDOW_HEIGHT - 20),
+                          CONSTS.BLACK, self.fontsize))
+        return texts
+
+    def __draw_panel(self):
+        """
+        Draw the scores panel if its texts or the profiler overlay changed since the last frame,
+        both only change on updates
+        :return: rectangles of the repainted panel
+        """
+        if self.panel_texts is None or self.panel_tick != self.tick or self.redraw_all:
+            texts = self.__get_panel_texts()
+            self.panel_tick = self.tick
+        else:
+            texts = self.panel_texts
+        hud_content = self.hud.get_content(self.profiler)
+        if texts == self.panel_texts and hud_content == self.panel_hud_content and not self.redraw_all:
+            return []
+
+        self.panel_texts, self.panel_hud_content = texts, hud_content
+        self.screen.fill(CONSTS.WHITE, self.panel_rect)
+        for text, pos, color, size in texts:
+            self.screen.blit(render_text(text, size, color, freetype=True), pos)
+        self.hud.draw(self.players, self.profiler, hud_content)
+        return [self.panel_rect]
 
     def __update_scene_status(self):
-        if not any([any([self.grid[x, y].color == CONSTS.EMPTY_CELL_COLOR
-                         for x in range(CONSTS.X_CELLS_COUNT)])
-                    for y in range(CONSTS.Y_CELLS_COUNT)]):
+        if self.headless:
+            if len(self.players) <= 1 or self.board.is_full():
+                self.scene_status['status'] = 'finished'
+                self.terminate()
+            return self.scene_status
+
+        if self.board.is_full() and self.players:
+            winner = max(self.players, key=lambda x: x.territory.area)
             self.switch2scene(StartScene(self.screen,
-                                         f"SUPER WINNER: {self.players[0].name}",
+                                         f"SUPER WINNER: {winner.name}",
                                          pos=(CONSTS.GRID_WIDTH // 2, CONSTS.GRID_HEIGHT // 2),
-                                         color=CONSTS.WHITE))
+                                         color=CONSTS.WHITE,
+                                         game_options=self.game_options))
 
         if len(self.players) <= 1:
             self.switch2scene(EndGameScene(self.screen,
@@ -445,24 +784,16 @@ class GameScene(SceneBase):
                                            pos=(CONSTS.WINDOW_WIDTH // 2, CONSTS.WINDOW_HEIGHT // 2),
                                            color=CONSTS.WHITE,
                                            players=sorted(self.players, key=lambda x: x.score)[::-1] +
-                                                   sorted(self.losers, key=lambda x: x.score)[::-1]))
+                                                   sorted(self.losers, key=lambda x: x.score)[::-1],
+                                           game_options=self.game_options))
         return self.scene_status
 
-    def get_busy_points(self):
-        players_points = {(p.x, p.y) for p in self.players}
-        bonuses_points = {(b.x, b.y) for b in self.bonuses}
-        territory_points = set()
-        for p in self.players:
-            territory_points |= {i for i in p.territory.points}
-        lines_points = set()
-        for player in self.players:
-            lines_points |= {i for i in player.line_points}
-
-        return players_points | bonuses_points | lines_points | territory_points
-
     def generate_bonus(self):
         if len(self.available_bonuses) > 0:
-            if random.randint(1, CONSTS.BONUS_CHANCE) == 1 and len(self.bonuses) < CONSTS.BONUSES_MAX_COUNT:
-                coors = generate_coordinates(self.players, self.get_busy_points())
-                bonus = random.choice(self.available_bonuses)(coors)
-                self.bonuses.append(bonus)
+            if self.rng.randint(1, CONSTS.BONUS_CHANCE) == 1 and len(self.bonuses) < CONSTS.BONUSES_MAX_COUNT:
+                coors = generate_coordinates(self.players, self.board, self.rng)
+                if coors is not None:
+                    bonus = self.rng.choice(self.available_bonuses)(coors)
+                    self.bonuses.append(bonus)
+                    self.delta.bonuses_spawned.append(bonus)
+                    self.board.spawn_cells.block_point(coors)
@@ -0,0 +1,131 @@
+import pickle
+
+import numpy as np
+
+from game_objects.bonuses import Nitro, ExtraLife
+from game_objects.player import LinePoints
+
+BONUS_TYPES = (Nitro, ExtraLife)
+# columns of the players array
+PLAYER_FIELDS = ('id', 'x', 'y', 'prev_x', 'prev_y', 'direction', 'tick', 'moveable_tick', 'captures', 'extra_life',
+                 'line_length')
+# columns of the bonuses array, the owner is 0 for bonuses lying on the board
+BONUS_FIELDS = ('owner', 'type', 'x', 'y', 'tick', 'active_ticks', 'activated')
+
+
+class Snapshot:
+    """
+    Simulation state of a GameScene packed into arrays: everything but the rendering.
+    It can only be restored into the scene it was taken from or into a scene made with the same options.
+    """
+
+    def __init__(self, tick, players, scores, lines, bonuses, alive, losers, board, rng, controllers):
+        """
+        :param players: a row of PLAYER_FIELDS per player
+        :param scores: score and tick score of every player
+        :param lines: points of the lines of all players, one after another
+        :param bonuses: a row of BONUS_FIELDS per bonus
+        :param alive: ids of the players in the game, in their order
+        :param losers: ids of the losers, in their order
+        :param board: arrays of Board.get_state
+        :param rng: state of the random.Random of the scene
+        :param controllers: states of the controllers in the order of the scene's controllers
+        """
+        self.tick = tick
+        self.players = players
+        self.scores = scores
+        self.lines = lines
+        self.bonuses = bonuses
+        self.alive = alive
+        self.losers = losers
+        self.board = board
+        self.rng = rng
+        self.controllers = controllers
+
+    def dumps(self):
+        return pickle.dumps(self.__dict__, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def loads(cls, data):
+        return cls(**pickle.loads(data))
+
+
+def _get_bonus_row(owner, bonus):
+    return owner, BONUS_TYPES.index(type(bonus)), bonus.x, bonus.y, bonus.tick, bonus.active_ticks, bonus.activated
+
+
+def _make_bonus(row):
+    _, bonus_type, x, y, tick, active_ticks, activated = row
+    bonus = BONUS_TYPES[bonus_type]((x, y))
+    bonus.tick, bonus.active_ticks, bonus.activated = tick, active_ticks, bool(activated)
+    return bonus
+
+
+def get_controllers(scene):
+    """
+    :return: every controller of the scene once, in the order of the players they drive
+    """
+    return list(dict.fromkeys(scene.controllers.values()))
+
+
+def take_snapshot(scene):
+    players = sorted(scene.players + scene.losers, key=lambda p: p.id)
+    lines = [point for p in players for point in p.line_points]
+    bonuses = [_get_bonus_row(0, bonus) for bonus in scene.bonuses] + \
+              [_get_bonus_row(p.id, bonus) for p in players for bonus in p.bonuses]
+    return Snapshot(
+        tick=scene.tick,
+        players=np.array([(p.id, p.x, p.y, p.prev_x, p.prev_y, list(p.move_commands.values()).index(p.direction),
+                           p.tick, p.moveable_tick, p.captures, p.extra_life, len(p.line_points)) for p in players],
+                         dtype=np.int64).reshape(-1, len(PLAYER_FIELDS)),
+        scores=np.array([(p.score, p.tick_score) for p in players], dtype=np.float64).reshape(-1, 2),
+        lines=np.array(lines, dtype=np.int64).reshape(-1, 2),
+        bonuses=np.array(bonuses, dtype=np.int64).reshape(-1, len(BONUS_FIELDS)),
+        alive=np.array([p.id for p in scene.players], dtype=np.int64),
+        losers=np.array([p.id for p in scene.losers], dtype=np.int64),
+        board=scene.board.get_state(),
+        rng=scene.rng.getstate(),
+        controllers=[controller.get_state() for controller in get_controllers(scene)],
+    )
+
+
+def restore_snapshot(scene, snapshot):
+    """
+    Bring the simulation of the scene back to the snapshot, the rendering has to be redone from scratch
+    """
+    players = {p.id: p for p in scene.players + scene.losers}
+    board = scene.board
+    board.lines.clear()
+
+    starts = np.concatenate([[0], np.cumsum(snapshot.players[:, -1])]).tolist()
+    lines = list(zip(snapshot.lines[:, 0].tolist(), snapshot.lines[:, 1].tolist()))
+    for row, (score, tick_score), start, end in zip(snapshot.players.tolist(), snapshot.scores.tolist(),
+                                                    starts, starts[1:]):
+        player_id, x, y, prev_x, prev_y, direction, tick, moveable_tick, captures, extra_life, _ = row
+        player = players[player_id]
+        player.x, player.y, player.prev_x, player.prev_y = x, y, prev_x, prev_y
+        player.direction = list(player.move_commands.values())[direction]
+        player.tick, player.moveable_tick, player.captures = tick, moveable_tick, captures
+        player.extra_life = bool(extra_life)
+        player.score, player.tick_score = score, tick_score
+        player.line_points = LinePoints(player, board, lines[start:end])
+        player.bonuses = []
+
+    # the lines block their spawn cells as they are made, the board state brings the spawn cells back
+    # as they were, in the same order
+    board.set_state(snapshot.board)
+
+    scene.bonuses = []
+    for row in snapshot.bonuses.tolist():
+        bonus = _make_bonus(row)
+        if row[0] == 0:
+            scene.bonuses.append(bonus)
+        else:
+            players[row[0]].bonuses.append(bonus)
+
+    scene.tick = snapshot.tick
+    scene.players = [players[player_id] for player_id in snapshot.alive.tolist()]
+    scene.losers = [players[player_id] for player_id in snapshot.losers.tolist()]
+    scene.rng.setstate(snapshot.rng)
+    for controller, state in zip(get_controllers(scene), snapshot.controllers):
+        controller.set_state(state)
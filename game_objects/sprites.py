@@ -0,0 +1,63 @@
+import os
+from functools import lru_cache
+
+import pygame
+
+SPRITES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sprites')
+
+
+@lru_cache(maxsize=None)
+def load_sprite(name):
+    """
+    Load the sprite once, sprites loaded after the display is set up are converted to its pixel format
+    :param name: name of a .png file in the sprites directory, without the extension
+    :return: the sprite, None if it is missing or can't be loaded
+    """
+    try:
+        image = pygame.image.load(os.path.join(SPRITES_DIR, f'{name}.png'))
+    except (pygame.error, FileNotFoundError):
+        return None
+    if pygame.display.get_surface() is not None:
+        image = image.convert_alpha()
+    return image
+
+
+@lru_cache(maxsize=None)
+def get_sprite(name, size, fallback=None):
+    """
+    :param size: width and height of the sprite
+    :param fallback: RGBA color of the square drawn instead of a missing sprite, transparent if None
+    :return: the sprite scaled to the size, shared by all callers and must not be changed
+    """
+    image = load_sprite(name)
+    if image is None:
+        sprite = pygame.Surface(size, pygame.SRCALPHA)
+        sprite.fill(fallback or (0, 0, 0, 0))
+        return sprite
+    return pygame.transform.smoothscale(image, size)
+
+
+class SpriteAtlas:
+    """
+    Sprites of one size packed into a single surface, drawing a sprite is one blit of a part of it
+    """
+
+    def __init__(self, sprites, size):
+        """
+        :param sprites: {name: fallback color} of the sprites, see get_sprite
+        :param size: width and height of every sprite
+        """
+        self.surface = pygame.Surface((size[0] * max(len(sprites), 1), size[1]), pygame.SRCALPHA)
+        self.rects = {}
+        for i, (name, fallback) in enumerate(sprites.items()):
+            # copied as is, blending over the transparent atlas would darken the edges
+            self.rects[name] = self.surface.blit(get_sprite(name, tuple(size), fallback), (i * size[0], 0),
+                                                 special_flags=pygame.BLEND_RGBA_MAX)
+        if pygame.display.get_surface() is not None:
+            self.surface = self.surface.convert_alpha()
+
+    def blit(self, screen, name, pos):
+        """
+        :return: rectangle of the screen the sprite was drawn to
+        """
+        return screen.blit(self.surface, pos, area=self.rects[name])
@@ -1,38 +1,76 @@
-import networkx as nx
-from config import CONSTS
-from helpers import (in_polygon,
-                     get_neighboring_points,
+from collections import deque
+from collections.abc import MutableSet
+
+from game_objects.board import Board
+from helpers import (get_neighboring_points,
                      get_vert_and_horiz_neighbours)
 
 
+class TerritoryPoints(MutableSet):
+    """Set of points of a single owner, backed by the shared board."""
+
+    def __init__(self, board, owner_id):
+        self.board = board
+        self.owner_id = owner_id
+
+    def __contains__(self, point):
+        return self.board.owner_of(point) == self.owner_id
+
+    def __iter__(self):
+        return iter(self.board.get_points(self.owner_id))
+
+    def __len__(self):
+        return self.board.area(self.owner_id)
+
+    def __repr__(self):
+        return f"{type(self).__name__}(owner_id={self.owner_id}, area={len(self)})"
+
+    def add(self, point):
+        self.board.assign([point], self.owner_id)
+
+    def discard(self, point):
+        self.board.release([point], self.owner_id)
+
+    def update(self, points):
+        return self.board.assign(points, self.owner_id)
+
+    def clear(self):
+        self.board.release_all(self.owner_id)
+
+
 class Territory:
-    def __init__(self, x, y, color):
+    def __init__(self, x, y, color, board=None, owner_id=1):
         self.color = color
-        self.points = {(x, y), *get_neighboring_points((x, y))}
+        self.board = board if board is not None else Board()
+        self.owner_id = owner_id
+        self.points = TerritoryPoints(self.board, owner_id)
+        self.points.update({(x, y), *get_neighboring_points((x, y))})
         self.changed = True
 
+    @property
+    def area(self):
+        """
+        Number of points of player's territory, counted by the board
+        """
+        return self.board.area(self.owner_id)
+
+    @property
+    def boundary(self):
+        """
+        Boundary of player's territory, kept up to date by the board as points change hands
+        """
+        return self.board.get_boundary(self.owner_id)
+
     def get_boundary(self):
         """
         Return the boundary of player's territory
         """
-        boundary = []
-        for point in self.points:
-            if any([neighboring not in self.points for neighboring in get_neighboring_points(point)]):
-                boundary.append(point)
-        return boundary
+        return list(self.boundary)
 
     @staticmethod
     def __get_boundary_siblings(point, boundary):
         return [sibling for sibling in get_neighboring_points(point) if sibling in boundary]
 
-    def get_boundary_graph(self, boundary):
-        graph = nx.Graph()
-        for index, point in enumerate(boundary):
-            siblings = self.__get_boundary_siblings(point, boundary)  # adjacent boundary points
-            for sibling in siblings:
-                graph.add_edge(index, boundary.index(sibling), weight=1)
-        return graph
-
     @staticmethod
     def _get_start_points(point, boundary):
         res = []
@@ -41,40 +79,88 @@ class Territory:
                 res.append(neighbour)
         return res
 
+    @staticmethod
+    def _get_closing_edge(p1, p2):
+        """
+        Rasterize the straight edge which closes the loop if its ends aren't adjacent
+        """
+        steps = max(abs(p2[0] - p1[0]), abs(p2[1] - p1[1]))
+        return [(round(p1[0] + (p2[0] - p1[0]) * i / steps), round(p1[1] + (p2[1] - p1[1]) * i / steps))
+                for i in range(1, steps)]
+
     def _capture(self, boundary):
-        polygon_x_arr = [x for x, _ in boundary]
-        polygon_y_arr = [y for _, y in boundary]
+        """
+        Flood the cells outside of the closed loop, starting from a corner of the loop's
+        bounding box expanded by one cell. Cells of the box which the flood can't reach
+        lie inside the loop.
+
+        :param boundary: points of the closed loop
+        :return: points inside the loop which don't belong to the territory
+        """
+        loop = set(boundary)
+        loop.update(self._get_closing_edge(boundary[-1], boundary[0]))
+        polygon_x_arr = [x for x, _ in loop]
+        polygon_y_arr = [y for _, y in loop]
 
-        max_x = max(polygon_x_arr)
-        max_y = max(polygon_y_arr)
-        min_x = min(polygon_x_arr)
-        min_y = min(polygon_y_arr)
+        max_x = max(polygon_x_arr) + 1
+        max_y = max(polygon_y_arr) + 1
+        min_x = min(polygon_x_arr) - 1
+        min_y = min(polygon_y_arr) - 1
+
+        outside = {(min_x, min_y)}
+        stack = [(min_x, min_y)]
+        while stack:
+            for neighbour in get_vert_and_horiz_neighbours(stack.pop()):
+                x, y = neighbour
+                if min_x <= x <= max_x and min_y <= y <= max_y \
+                        and neighbour not in loop and neighbour not in outside:
+                    outside.add(neighbour)
+                    stack.append(neighbour)
 
         captured = []
-        for x in range(max_x, min_x, -1):
-            for y in range(max_y, min_y, -1):
-                # if (x, y) not in self.points and in_polygon(x, y, polygon_x_arr, polygon_y_arr):
-                if (x, y) not in self.points and in_polygon(x, y, boundary):
-                    captured.append((x, y))
+        for x in range(max_x - 1, min_x, -1):
+            for y in range(max_y - 1, min_y, -1):
+                point = (x, y)
+                if point not in loop and point not in outside and point not in self.points:
+                    captured.append(point)
         return captured
 
     @staticmethod
     def is_siblings(p1, p2):
         return p2 in get_vert_and_horiz_neighbours(p1)
 
+    def _get_boundary_path(self, start, end):
+        """
+        Breadth-first search of the shortest path between two boundary points,
+        moving between vertical, horizontal and diagonal neighbours
+        :return: points of the path from start to end, empty if there is no path
+        """
+        boundary = self.boundary
+        parents = {start: None}  # visited point -> previous point of the path
+        queue = deque([start])
+        while queue:
+            point = queue.popleft()
+            if point == end:
+                path = []
+                while point is not None:
+                    path.append(point)
+                    point = parents[point]
+                return path[::-1]
+            for sibling in get_neighboring_points(point):
+                if sibling in boundary and sibling not in parents:
+                    parents[sibling] = point
+                    queue.append(sibling)
+        return []
+
     def get_voids(self, line_points):
-        boundary = self.get_boundary()  # get boundary of current territory
-        boundary_graph = self.get_boundary_graph(boundary)  # get graph representation of boundary
+        boundary = self.boundary  # boundary of current territory
 
-        end_index = boundary.index(line_points[-1])
         start_point = self.__get_boundary_siblings(line_points[0], boundary)
-        start_index = boundary.index(start_point[0])
-        try:
-            path = nx.shortest_path(boundary_graph, end_index, start_index, weight='weight')
-        except (nx.NetworkXNoPath, nx.NodeNotFound):
+        if line_points[-1] in boundary and start_point:
+            path = self._get_boundary_path(line_points[-1], start_point[0])
+        else:
             path = []
-        path = [boundary[index] for index in path]
-        
+
         return line_points + path
 
     def capture(self, line_points):
@@ -101,42 +187,115 @@ class Territory:
 
         return captured
 
+    def add_points(self, points):
+        """
+        :param points: New points of the territory
+        :return: Previous owners of the points taken from other territories
+        """
+        previous = self.points.update(points)
+        if len(previous) > 0:
+            self.changed = True
+        return previous[previous != Board.FREE]
+
     def remove_points(self, points):
-        removed = []
-        for point in points:
-            if point in self.points:
-                self.points.discard(point)
-                removed.append(point)
+        removed = self.board.release(points, self.owner_id)
 
         if len(removed) > 0:
             self.changed = True
         return removed
 
-    def split(self, line, direction, player):
-        removed = []
-        l_point = line[0]
-
-        if any([point in self.points for point in line]):
-            for point in list(self.points):
-                if direction in [CONSTS.UP, CONSTS.DOWN]:
-                    if player.x < l_point[0]:
-                        if point[0] >= l_point[0]:
-                            removed.append(point)
-                            self.points.discard(point)
-                    else:
-                        if point[0] <= l_point[0]:
-                            removed.append(point)
-                            self.points.discard(point)
-
-                if direction in [CONSTS.LEFT, CONSTS.RIGHT]:
-                    if player.y < l_point[1]:
-                        if point[1] >= l_point[1]:
-                            removed.append(point)
-                            self.points.discard(point)
-                    else:
-                        if point[1] <= l_point[1]:
-                            removed.append(point)
-                            self.points.discard(point)
+    def split(self, cut, anchor):
+        """
+        Take the cut points away from the territory and keep only one of the parts next to the cut:
+        the part with the anchor point or the largest one if the anchor isn't in any of them.
+        Parts are searched breadth-first from the cut in lockstep and the search stops when a single
+        part is left unexplored, so it takes time proportional to the smaller parts, unless the kept part
+        is one of the smaller ones and the larger one has to be explored to be released.
+        Only the parts next to the cut are released, parts of the territory which don't touch it are
+        kept whichever part the anchor is in.
+
+        :param cut: points taken away from the territory
+        :param anchor: point of the part to keep, usually the owner's head
+        :return: released points, the cut included
+        """
+        removed = self.board.release(cut, self.owner_id)
+
+        # every territory point next to the cut starts a search, searches which meet are merged
+        labels = {}  # point -> search which reached it first
+        parents = {}  # search -> search it was merged into
+        members = {}  # search -> points it reached
+        queues = {}  # search -> points to expand, only for searches which aren't finished
+        for search, seed in enumerate({neighbour for point in removed
+                                       for neighbour in get_neighboring_points(point) if neighbour in self.points}):
+            labels[seed] = parents[search] = search
+            members[search] = [seed]
+            queues[search] = deque([seed])
+
+        def find(search):
+            while parents[search] != search:
+                parents[search] = parents[parents[search]]
+                search = parents[search]
+            return search
+
+        def anchor_part():
+            return find(labels[anchor]) if anchor in labels else None
+
+        def is_settled():
+            part = anchor_part()
+            if part in finished or not queues:
+                return True
+            # the last unfinished part is kept if it has the anchor or is the largest one
+            return len(queues) == 1 and (part is not None or len(members[next(iter(queues))]) >= largest)
+
+        def expand():
+            """
+            Expand every unfinished search by one point
+            """
+            nonlocal largest
+            for search in list(queues):
+                if search not in queues:
+                    continue  # merged into another search in this round
+                if not queues[search]:
+                    finished.add(search)
+                    largest = max(largest, len(members[search]))
+                    del queues[search]
+                    continue
+                queue, reached = queues[search], members[search]
+                for neighbour in get_vert_and_horiz_neighbours(queue.popleft()):
+                    other = labels.get(neighbour)
+                    if other is None:
+                        if self.board.owner_of(neighbour) == self.owner_id:
+                            labels[neighbour] = search
+                            reached.append(neighbour)
+                            queue.append(neighbour)
+                        continue
+                    if other == search:
+                        continue
+                    other = find(other)
+                    if other != search:
+                        # the smaller search joins the larger one
+                        if len(members[other]) > len(members[search]):
+                            search, other = other, search
+                        parents[other] = search
+                        members[search].extend(members.pop(other))
+                        queues[search].extend(queues.pop(other))
+                        queue, reached = queues[search], members[search]
+
+        finished = set()
+        largest = 0
+        while not is_settled():
+            expand()
+
+        kept = anchor_part()
+        if kept in finished:
+            # the anchor is in one of the smaller parts, the larger one is explored to the end to be released
+            while queues:
+                expand()
+        elif kept is None:
+            kept = next(iter(queues), None) if queues else \
+                max(finished, key=lambda part: len(members[part]), default=None)
+        released = [point for part in finished if part != kept for point in members[part]]
+        removed += self.board.release(released, self.owner_id)
 
         if len(removed) > 0:
             self.changed = True
@@ -0,0 +1,107 @@
+"""
+Headless simulation: runs GameScene without a window and without a frame cap
+and reports how many ticks per second the game logic makes.
+
+python headless.py --mode classic --ticks 10000 --seed 1
+python headless.py --mode timeLIMIT --players 120 --width 1000 --height 1000 --bots loop
+"""
+import argparse
+import random
+import time
+
+from config import CONSTS
+from game_objects.bots import BOTS
+from game_objects.scene import GameScene
+
+DIRECTIONS = ['up', 'down', 'left', 'right']
+
+
+def random_inputs(rng, turn_chance=0.2):
+    """
+    Inputs of players which turn in a random direction now and then, players driven by bots are left to them
+    :param rng: random.Random
+    :return: function of the scene returning commands for GameScene.apply_commands
+    """
+    def inputs(scene):
+        return {player.id: (rng.choice(DIRECTIONS), None)
+                for player in scene.players if player.id not in scene.controllers and rng.random() < turn_chance}
+    return inputs
+
+
+def scripted_inputs(script):
+    """
+    :param script: {tick: commands for GameScene.apply_commands}
+    :return: function of the scene returning the commands of the current tick
+    """
+    def inputs(scene):
+        return script.get(scene.tick, {})
+    return inputs
+
+
+def run_headless(game_mode='classic', max_ticks=None, inputs=None, seed=None, **scene_options):
+    """
+    Simulate a match as fast as possible
+    :param max_ticks: stop after that many ticks even if the match isn't over
+    :param inputs: function of the scene returning commands to apply before every tick
+    :param seed: seed of the match, spawns, bonuses and bots depend on it
+    :param scene_options: players_count, width, height, bots and record_dir of GameScene
+    :return: match summary
+    """
+    scene = GameScene(None, game_mode=game_mode, seed=seed, **scene_options)
+
+    started = time.perf_counter()
+    while scene.next_scene is scene and (max_ticks is None or scene.tick < max_ticks):
+        if inputs is not None:
+            scene.apply_commands(inputs(scene))
+        scene.update()
+    elapsed = time.perf_counter() - started
+    scene.finish_recording()
+    return get_summary(scene, elapsed)
+
+
+def get_summary(scene, elapsed):
+    """
+    :param elapsed: seconds the match took
+    :return: match summary
+    """
+    players = sorted(scene.players + scene.losers, key=lambda x: x.score)[::-1]
+    return {
+        'ticks': scene.tick,
+        'seconds': elapsed,
+        'ticks_per_second': scene.tick / elapsed if elapsed > 0 else float('inf'),
+        'winner': players[0].name if len(players) == 1 or players[0].score > players[1].score else None,
+        'scores': {player.name: player.score for player in players},
+        'captures': {player.name: player.captures for player in players},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=['classic', 'timeLIMIT'], default='classic')
+    parser.add_argument('--ticks', type=int, default=None, help='maximum number of ticks of a match')
+    parser.add_argument('--matches', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first match')
+    parser.add_argument('--turn-chance', type=float, default=0.2,
+                        help='chance of a random turn of every player on every tick')
+    parser.add_argument('--players', type=int, default=2)
+    parser.add_argument('--width', type=int, default=CONSTS.X_CELLS_COUNT, help='board width in cells')
+    parser.add_argument('--height', type=int, default=CONSTS.Y_CELLS_COUNT, help='board height in cells')
+    parser.add_argument('--bots', choices=sorted(BOTS), default=None, help='bot of the players beyond the first two')
+    parser.add_argument('--record-dir', default=None, help='directory to record the matches to')
+    args = parser.parse_args()
+
+    total_ticks = total_seconds = 0
+    for seed in range(args.seed, args.seed + args.matches):
+        result = run_headless(args.mode, args.ticks, random_inputs(random.Random(seed), args.turn_chance), seed,
+                              players_count=args.players, width=args.width, height=args.height,
+                              bots=args.bots, record_dir=args.record_dir)
+        total_ticks += result['ticks']
+        total_seconds += result['seconds']
+        print(f"seed {seed}: {result['ticks']} ticks, {result['ticks_per_second']:.0f} ticks/s, "
+              f"scores {result['scores']}")
+    if args.matches > 1:
+        print(f"total: {total_ticks} ticks, {total_ticks / total_seconds:.0f} ticks/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,22 @@
 import random
-from shapely.geometry import Point
-from shapely.geometry.polygon import Polygon
+from functools import lru_cache
+
+import pygame
+import pygame.freetype
+
 from config import CONSTS
 
 
-def get_random_coordinates():
-    return random.randint(CONSTS.X_CELLS_COUNT // 4, CONSTS.X_CELLS_COUNT - (CONSTS.X_CELLS_COUNT // 4)), \
-           random.randint(CONSTS.Y_CELLS_COUNT // 4, CONSTS.Y_CELLS_COUNT - (CONSTS.Y_CELLS_COUNT // 4))
+def get_spawn_region(width=CONSTS.X_CELLS_COUNT, height=CONSTS.Y_CELLS_COUNT):
+    """
+    :return: x_min, y_min, x_max, y_max of the part of the board where players and bonuses appear
+    """
+    return width // 4, height // 4, min(width - (width // 4), width - 1), min(height - (height // 4), height - 1)
+
+
+def get_random_coordinates(width=CONSTS.X_CELLS_COUNT, height=CONSTS.Y_CELLS_COUNT, rng=random):
+    x_min, y_min, x_max, y_max = get_spawn_region(width, height)
+    return rng.randint(x_min, x_max), rng.randint(y_min, y_max)
 
 
 class DrawableObj:
@@ -19,6 +29,47 @@ class DrawableObj:
         pass
 
 
+def draw_grid_lines(surface, size, cell_size, color=CONSTS.GRID_LINE_COLOR):
+    """
+    Draw lines between the cells of a grid, the outer lines are thicker
+    :param size: width and height of the grid in pixels
+    :param cell_size: width and height of a cell in pixels
+    """
+    width, height = size
+    cell_width, cell_height = cell_size
+    for y in range(0, height + 1, cell_height):
+        line_width = 3 if y == 0 or y == height else 1
+        pygame.draw.line(surface, color, (0, y), (width, y), width=line_width)
+    for x in range(0, width + 1, cell_width):
+        line_width = 3 if x == 0 or x == width else 1
+        pygame.draw.line(surface, color, (x, 0), (x, height), width=line_width)
+
+
+@lru_cache(maxsize=None)
+def get_font(size, name=None, freetype=False):
+    """
+    :param freetype: pygame.freetype.Font instead of pygame.font.Font
+    :return: font of the size, made once and shared
+    """
+    if freetype:
+        pygame.freetype.init()
+        return pygame.freetype.Font(name, size)
+    return pygame.font.Font(name, size)
+
+
+@lru_cache(maxsize=CONSTS.TEXT_CACHE_SIZE)
+def render_text(text, size, color, name=None, freetype=False):
+    """
+    Rasterize the antialiased text once, the least recently used surfaces are evicted
+    :param color: RGB or RGBA tuple
+    :return: surface with the text, shared by all callers and must not be changed
+    """
+    font = get_font(size, name, freetype)
+    if freetype:
+        return font.render(text, color, None, size=size)[0]
+    return font.render(text, True, color)
+
+
 # TERRITORY HELPERS
 def get_diagonal_neighbours(point):
     x, y = point
@@ -50,30 +101,22 @@ def get_neighboring_points(point):
     ]
 
 
-def in_polygon(x, y, boundary):
-    """
-    :param x: point x coordinate
-    :param y: point y coordinate
-    :param boundary: a polygon
-    :return: True if point is inside the polygon else False
-    """
-    point = Point(x, y)
-    polygon = Polygon(boundary)
-    is_inside = polygon.contains(point)
-
-    return is_inside
-
-
-def is_available_point(x, y, players, busy_points):
+def is_available_point(x, y, players, busy_points, board=None):
     for p in players:
-        if (p.x - 4 <= x <= p.x + 4) and (p.y - 4 <= y <= p.y + 4):
+        if abs(p.x - x) <= CONSTS.SPAWN_HEAD_DISTANCE and abs(p.y - y) <= CONSTS.SPAWN_HEAD_DISTANCE:
             return False
+    if board is not None and board.owner_of((x, y)) != board.FREE:
+        return False
     return (x, y) not in busy_points
 
 
-def generate_coordinates(players, busy_points):
-    x, y = get_random_coordinates()
-    while not is_available_point(x, y, players, busy_points):
-        x, y = get_random_coordinates()
-    return x, y
-
+def generate_coordinates(players, board, rng=random):
+    """
+    Pick a random free point of the spawn region which is not close to any player's head and not
+    on a line or a bonus, in constant time however full the board is
+    :param players: players whose heads the point has to be away from
+    :param rng: random.Random of the match
+    :return: (x, y) or None if there is no such point
+    """
+    board.spawn_cells.set_heads((p.x, p.y) for p in players)
+    return board.spawn_cells.sample(rng)
@@ -0,0 +1,66 @@
+"""
+Playback of a recorded match: the seed and the commands of the replay play the same match again,
+headless as fast as possible or rendered in a window.
+
+python playback.py match_20240101_120000_42.replay
+python playback.py match_20240101_120000_42.replay --render --ticks-per-second 20
+"""
+import argparse
+import time
+
+import pygame
+
+from config import CONSTS
+from game_objects.replay import Replay
+from game_objects.scene import GameScene
+from headless import get_summary
+
+
+def play_replay(replay, screen=None, ticks_per_second=None):
+    """
+    :param replay: Replay to play
+    :param screen: surface to draw every tick on, None to play headless
+    :param ticks_per_second: speed of a rendered playback, None for as fast as possible
+    :return: match summary
+    """
+    scene = GameScene(screen, **replay.options)
+    clock = pygame.time.Clock()
+
+    started = time.perf_counter()
+    while scene.next_scene is scene and (replay.end_tick is None or scene.tick < replay.end_tick):
+        replay.apply(scene)
+        scene.update()
+        if screen is not None:
+            pygame.event.pump()
+            dirty_rects = scene.render()
+            if dirty_rects is None:
+                pygame.display.flip()
+            else:
+                pygame.display.update(dirty_rects)
+            if ticks_per_second:
+                clock.tick(ticks_per_second)
+    return get_summary(scene, time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('replay', help='replay file written by a recorded match')
+    parser.add_argument('--render', action='store_true', help='draw the match in a window')
+    parser.add_argument('--ticks-per-second', type=int, default=None,
+                        help='speed of a rendered playback, as fast as possible by default')
+    args = parser.parse_args()
+
+    replay = Replay.load(args.replay)
+    screen = None
+    if args.render:
+        pygame.init()
+        pygame.display.set_caption("Grab The Map")
+        screen = pygame.display.set_mode((CONSTS.WINDOW_WIDTH, CONSTS.GRID_HEIGHT))
+        screen.fill(CONSTS.WHITE)
+    result = play_replay(replay, screen, args.ticks_per_second)
+    print(f"seed {replay.options['seed']}: {result['ticks']} ticks, {result['ticks_per_second']:.0f} ticks/s, "
+          f"scores {result['scores']}")
+
+
+if __name__ == '__main__':
+    main()
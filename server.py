@@ -0,0 +1,167 @@
+"""
+Authoritative game server: simulates matches headless at a fixed tick rate, takes direction and nitro
+commands from TCP clients and sends every client the changes of the match after every tick.
+A client gets a player of its own while there are free ones and watches otherwise, players without
+a client are driven by a bot. A new match starts as soon as one is over.
+
+python server.py --port 8765 --players 8 --bots random
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from config import CONSTS
+from game_objects.bots import BOTS
+from game_objects.protocol import (COMMAND, decode_client_command, encode_delta, encode_state, encode_welcome, frame,
+                                   read_message)
+from game_objects.scene import GameScene
+
+
+class Client:
+    def __init__(self, writer, player_id):
+        """
+        :param player_id: id of the player of the client, 0 for a spectator
+        """
+        self.writer = writer
+        self.player_id = player_id
+        self.synced = False  # the client has the state of the last tick sent and can take the next delta
+        self.dropped = 0  # messages not sent because the client hadn't read the previous ones
+
+    def send(self, message, buffer_limit):
+        """
+        Queue the message without waiting, it is dropped if more than buffer_limit bytes are still queued
+        :return: True if the message is queued
+        """
+        if self.writer.is_closing():
+            return False
+        if self.writer.transport.get_write_buffer_size() > buffer_limit:
+            self.dropped += 1
+            return False
+        self.writer.write(message)
+        return True
+
+
+class GameServer:
+    def __init__(self, game_mode='classic', players_count=8, width=CONSTS.X_CELLS_COUNT,
+                 height=CONSTS.Y_CELLS_COUNT, bots='random', ticks_per_second=CONSTS.TICKS_PER_SECOND,
+                 buffer_limit=CONSTS.SERVER_BUFFER_LIMIT):
+        """
+        :param bots: name of the reference bot of the players without a client, None to let them go straight
+        :param buffer_limit: bytes queued for a client above which it gets no new states
+        """
+        self.scene_options = {'game_mode': game_mode, 'players_count': players_count, 'width': width, 'height': height}
+        self.bots = bots
+        self.ticks_per_second = ticks_per_second
+        self.buffer_limit = buffer_limit
+        self.clients = set()
+        self.commands = []  # player id and command of every command received since the last tick
+        self.tick_times = []  # seconds every tick took since the last stats
+        self.scene = self.bot = None
+        self.new_match()
+
+    def new_match(self):
+        self.scene = GameScene(None, **self.scene_options)
+        for client in self.clients:
+            client.synced = False
+        self.bot = None
+        if self.bots is not None:
+            self.bot = BOTS[self.bots](np.random.default_rng(self.scene.rng.getrandbits(64)))
+            taken = {client.player_id for client in self.clients}
+            self.scene.controllers.update({p.id: self.bot for p in self.scene.players if p.id not in taken})
+
+    def claim_player(self):
+        """
+        :return: id of a player without a client, 0 if there are none
+        """
+        taken = {client.player_id for client in self.clients}
+        for player_id in range(1, self.scene_options['players_count'] + 1):
+            if player_id not in taken:
+                return player_id
+        return 0
+
+    async def handle_client(self, reader, writer):
+        client = Client(writer, self.claim_player())
+        self.clients.add(client)
+        self.scene.controllers.pop(client.player_id, None)
+        writer.write(frame(encode_welcome(client.player_id, self.scene.board.width, self.scene.board.height)))
+        try:
+            while True:
+                payload = await read_message(reader)
+                if payload[:1] == COMMAND and client.player_id:
+                    self.commands.append((client.player_id, decode_client_command(payload)))
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass  # the client is gone or talks nonsense
+        finally:
+            self.clients.discard(client)
+            if client.player_id and self.bot is not None:
+                self.scene.controllers[client.player_id] = self.bot
+            writer.close()
+
+    def tick(self):
+        started = time.perf_counter()
+        for player_id, command in self.commands:
+            self.scene.apply_commands({player_id: command})
+        self.commands.clear()
+        self.scene.update()
+
+        # clients in sync get the delta of the tick and the others the whole state, each is encoded
+        # once and queued for every client that needs it, nobody is waited for
+        delta = None if self.scene.delta.resync else frame(encode_delta(self.scene))
+        state = None
+        for client in self.clients:
+            if client.synced and delta is not None:
+                client.synced = client.send(delta, self.buffer_limit)
+            else:
+                state = state or frame(encode_state(self.scene))
+                client.synced = client.send(state, self.buffer_limit)
+        if self.scene.next_scene is not self.scene:
+            self.new_match()
+        self.tick_times.append(time.perf_counter() - started)
+
+    def print_stats(self, seconds):
+        times = np.array(self.tick_times or [0]) * 1000
+        print(f"{len(self.tick_times) / seconds:.1f} ticks/s, tick {times.mean():.2f} ms (max {times.max():.2f} ms), "
+              f"{len(self.clients)} clients, {sum(client.dropped for client in self.clients)} messages dropped")
+        self.tick_times.clear()
+
+    async def run(self, host, port, stats_interval=None):
+        server = await asyncio.start_server(self.handle_client, host, port)
+        loop = asyncio.get_running_loop()
+        tick_time = 1 / self.ticks_per_second
+        next_tick = next_stats = loop.time()
+        async with server:
+            while True:
+                self.tick()
+                # a late tick is made up for at once, unless the server is too far behind
+                next_tick = max(next_tick + tick_time, loop.time() - CONSTS.MAX_CATCH_UP_TICKS * tick_time)
+                if stats_interval and loop.time() >= next_stats + stats_interval:
+                    self.print_stats(loop.time() - next_stats)
+                    next_stats = loop.time()
+                await asyncio.sleep(max(0.0, next_tick - loop.time()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=CONSTS.SERVER_PORT)
+    parser.add_argument('--mode', choices=['classic', 'timeLIMIT'], default='classic')
+    parser.add_argument('--players', type=int, default=8)
+    parser.add_argument('--width', type=int, default=CONSTS.X_CELLS_COUNT, help='board width in cells')
+    parser.add_argument('--height', type=int, default=CONSTS.Y_CELLS_COUNT, help='board height in cells')
+    parser.add_argument('--bots', choices=sorted(BOTS), default='random', help='bot of the players without a client')
+    parser.add_argument('--ticks-per-second', type=int, default=CONSTS.TICKS_PER_SECOND)
+    parser.add_argument('--stats', type=float, default=5, help='seconds between the stats lines, 0 for none')
+    args = parser.parse_args()
+
+    server = GameServer(args.mode, args.players, args.width, args.height, args.bots, args.ticks_per_second)
+    print(f"serving on {args.host}:{args.port}")
+    try:
+        asyncio.run(server.run(args.host, args.port, args.stats))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+import random
+
+import numpy as np
+import pytest
+
+from config import CONSTS
+from game_objects.board import Board
+from helpers import get_neighboring_points
+
+
+def get_expected_boundary(owners, owner):
+    """
+    Cells of the owner with a neighbour, diagonal included, of another owner or out of the board
+    """
+    width, height = owners.shape
+    return {(x, y) for x, y in zip(*np.nonzero(owners == owner))
+            for nx, ny in get_neighboring_points((int(x), int(y)))
+            if not (0 <= nx < width and 0 <= ny < height) or owners[nx, ny] != owner}
+
+
+def check_board(board, owners):
+    """
+    Compare every structure of the board with the ones derived from the expected owners of the cells
+    """
+    assert (board.get_owners() == owners).all()
+    for owner in range(4):
+        assert board.area(owner) == (owners == owner).sum()
+        if owner != Board.FREE:
+            assert set(board.get_points(owner)) == set(zip(*map(np.ndarray.tolist, np.nonzero(owners == owner))))
+            assert board.get_boundary(owner) == get_expected_boundary(owners, owner)
+    assert board.owned_count == (owners != Board.FREE).sum()
+    assert board.is_full() == (owners != Board.FREE).all()
+    # chunks of free cells only are dropped
+    for chunk_id, chunk in board.chunks.items():
+        assert (chunk != Board.FREE).any(), chunk_id
+
+
+@pytest.mark.parametrize('chunk_size', [4, 7, CONSTS.BOARD_CHUNK_SIZE])
+def test_board_bookkeeping(chunk_size):
+    rng = random.Random(chunk_size)
+    board = Board(23, 17, chunk_size)
+    owners = np.zeros((23, 17), dtype=np.uint8)
+    for _ in range(300):
+        owner = rng.randrange(1, 4)
+        x, y = rng.randrange(23), rng.randrange(17)
+        points = [(x + dx, y + dy) for dx in range(rng.randrange(1, 6)) for dy in range(rng.randrange(1, 6))]
+        points = [point for point in points if board.in_bounds(point)]
+        if rng.random() < 0.6:
+            previous = board.assign(points, owner)
+            assert sorted(previous.tolist()) == \
+                sorted(int(owners[point]) for point in points if owners[point] != owner)
+            for point in points:
+                owners[point] = owner
+        else:
+            released = board.release(points, owner)
+            assert set(released) == {point for point in points if owners[point] == owner}
+            for point in released:
+                owners[point] = Board.FREE
+        if rng.random() < 0.05:
+            board.release_all(owner)
+            owners[owners == owner] = Board.FREE
+        check_board(board, owners)
+
+
+def test_board_state_round_trip():
+    board = Board(20, 20, 8)
+    board.assign([(x, y) for x in range(3, 12) for y in range(2, 9)], 1)
+    board.assign([(x, y) for x in range(10, 18) for y in range(6, 15)], 2)
+    state = board.get_state()
+    owners = board.get_owners().copy()
+    spawn_cells = board.spawn_cells.get_state()['cells'].copy()
+
+    board.release_all(1)
+    board.assign([(0, 0), (19, 19)], 3)
+    board.set_state(state)
+    check_board(board, owners)
+    assert (board.spawn_cells.get_state()['cells'] == spawn_cells).all()
+
+
+def get_pickable(spawn_cells):
+    cells = spawn_cells.cells[:spawn_cells.count]
+    # every pickable cell knows its place and no other cell has one
+    assert (spawn_cells.places[cells] == np.arange(spawn_cells.count)).all()
+    assert (spawn_cells.places >= 0).sum() == spawn_cells.count
+    x_min, y_min, _, _ = spawn_cells.region
+    return {(x_min + cell // spawn_cells.height, y_min + cell % spawn_cells.height) for cell in cells.tolist()}
+
+
+def get_expected_pickable(board, heads, blocked):
+    x_min, y_min, x_max, y_max = board.spawn_cells.region
+    distance = CONSTS.SPAWN_HEAD_DISTANCE
+    return {(x, y) for x in range(x_min, x_max + 1) for y in range(y_min, y_max + 1)
+            if board.owner_of((x, y)) == Board.FREE and (x, y) not in blocked and
+            not any(abs(x - hx) <= distance and abs(y - hy) <= distance for hx, hy in heads)}
+
+
+def test_free_cells_bookkeeping():
+    rng = random.Random(0)
+    board = Board(30, 30, 8)
+    spawn_cells = board.spawn_cells
+    heads, blocked = [], []
+    for _ in range(300):
+        action = rng.random()
+        point = (rng.randrange(30), rng.randrange(30))
+        if action < 0.3:
+            board.assign([(point[0] + dx, point[1] + dy) for dx in range(3) for dy in range(3)
+                          if board.in_bounds((point[0] + dx, point[1] + dy))], rng.randrange(1, 4))
+        elif action < 0.5:
+            board.release_all(rng.randrange(1, 4))
+        elif action < 0.7:
+            spawn_cells.block_point(point)
+            blocked.append(point)
+        elif action < 0.8 and blocked:
+            spawn_cells.unblock_point(blocked.pop(rng.randrange(len(blocked))))
+        else:
+            heads = [(rng.randrange(30), rng.randrange(30)) for _ in range(rng.randrange(4))]
+            spawn_cells.set_heads(heads)
+        assert get_pickable(spawn_cells) == get_expected_pickable(board, heads, set(blocked))
+        assert len(spawn_cells) == spawn_cells.count
+
+
+def test_free_cells_sample():
+    board = Board(20, 20, 8)
+    spawn_cells = board.spawn_cells
+    rng = random.Random(1)
+    x_min, y_min, x_max, y_max = spawn_cells.region
+    board.assign([(x, y) for x in range(x_min, x_max + 1) for y in range(y_min, y_max + 1) if (x + y) % 5], 1)
+    pickable = get_pickable(spawn_cells)
+    assert pickable and {spawn_cells.sample(rng) for _ in range(500)} == pickable
+
+    board.assign(list(pickable), 2)
+    assert len(spawn_cells) == 0
+    assert spawn_cells.sample(rng) is None
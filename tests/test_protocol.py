@@ -0,0 +1,62 @@
+import random
+
+import numpy as np
+import pytest
+
+from game_objects.protocol import decode_state, encode_delta, encode_state
+from game_objects.scene import GameScene
+from headless import random_inputs
+
+
+def assert_same_state(state, expected):
+    assert state.tick == expected.tick
+    assert (state.players == expected.players).all()
+    assert {player_id: line for player_id, line in state.lines.items() if line} == \
+           {player_id: line for player_id, line in expected.lines.items() if line}
+    assert state.bonuses == expected.bonuses
+    assert (state.owners == expected.owners).all()
+
+
+def sync(scene, state):
+    """
+    Bring the client state up to date with the last update of the scene the way the server does
+    :return: the client state
+    """
+    if scene.delta.resync:
+        return decode_state(encode_state(scene))
+    assert state.apply_delta(encode_delta(scene))
+    return state
+
+
+@pytest.mark.parametrize('game_mode', ['classic', 'timeLIMIT'])
+@pytest.mark.parametrize('seed', range(3))
+def test_deltas_keep_client_in_sync(game_mode, seed):
+    scene = GameScene(None, game_mode=game_mode, players_count=6, width=30, height=30, bots='loop', seed=seed)
+    inputs = random_inputs(random.Random(seed))
+    state = decode_state(encode_state(scene))
+    snapshot = None
+    while scene.next_scene is scene and scene.tick < 400:
+        scene.apply_commands(inputs(scene))
+        scene.update()
+        state = sync(scene, state)
+        assert_same_state(state, decode_state(encode_state(scene)))
+        if scene.tick == 50:
+            snapshot = scene.snapshot()
+        elif scene.tick == 100 and snapshot is not None:
+            # the state is sent again after the match was rolled back
+            scene.restore(snapshot)
+            snapshot = None
+            scene.update()
+            state = sync(scene, state)
+            assert_same_state(state, decode_state(encode_state(scene)))
+
+
+def test_delta_of_another_tick_is_refused():
+    scene = GameScene(None, players_count=2, width=20, height=20, seed=0)
+    state = decode_state(encode_state(scene))
+    owners = state.owners.copy()
+    scene.update()
+    scene.update()
+    assert not state.apply_delta(encode_delta(scene))
+    assert state.tick == 0
+    assert np.array_equal(state.owners, owners)
@@ -0,0 +1,75 @@
+import os
+import random
+
+import pytest
+
+from game_objects.protocol import encode_state
+from game_objects.replay import Replay
+from game_objects.scene import GameScene
+from game_objects.snapshot import Snapshot
+from headless import random_inputs, run_headless
+from playback import play_replay
+
+
+def play(scene, inputs, ticks):
+    """
+    :return: encoded states and scores of the scene after every tick
+    """
+    states = []
+    for _ in range(ticks):
+        if scene.next_scene is not scene:
+            break
+        scene.apply_commands(inputs(scene))
+        scene.update()
+        states.append((encode_state(scene), sorted(p.score for p in scene.players + scene.losers)))
+    return states
+
+
+@pytest.mark.parametrize('game_mode', ['classic', 'timeLIMIT'])
+@pytest.mark.parametrize('bots', [None, 'random', 'loop'])
+def test_snapshot_round_trip(game_mode, bots):
+    options = dict(game_mode=game_mode, players_count=5, width=30, height=30, bots=bots, seed=3)
+    scene = GameScene(None, **options)
+    inputs_rng = random.Random(3)
+    inputs = random_inputs(inputs_rng)
+    play(scene, inputs, 40)
+    snapshot = Snapshot.loads(scene.snapshot().dumps())
+    inputs_state = inputs_rng.getstate()
+    expected = play(scene, inputs, 300)
+    assert expected
+
+    # the match is played the same way again, even if it was over
+    scene.restore(snapshot)
+    inputs_rng.setstate(inputs_state)
+    assert play(scene, inputs, 300) == expected
+
+    # by another scene of the same match
+    scene = GameScene(None, **options)
+    play(scene, random_inputs(random.Random(4)), 20)
+    scene.restore(snapshot)
+    inputs_rng.setstate(inputs_state)
+    assert play(scene, inputs, 300) == expected
+
+
+@pytest.mark.parametrize('game_mode', ['classic', 'timeLIMIT'])
+def test_replay_round_trip(tmp_path, game_mode):
+    summary = run_headless(game_mode, 300, random_inputs(random.Random(5)), 5, players_count=4, width=30,
+                           height=30, bots='random', record_dir=str(tmp_path))
+    replay = Replay.load(os.path.join(tmp_path, os.listdir(tmp_path)[0]))
+    assert replay.end_tick == summary['ticks']
+    assert replay.options == {'seed': 5, 'game_mode': game_mode, 'players_count': 4, 'width': 30, 'height': 30,
+                              'bots': 'random'}
+
+    played = play_replay(replay)
+    for key in ('ticks', 'winner', 'scores', 'captures'):
+        assert played[key] == summary[key]
+
+
+def test_replay_version(tmp_path):
+    run_headless('classic', 10, None, 1, players_count=2, width=20, height=20, record_dir=str(tmp_path))
+    path = os.path.join(tmp_path, os.listdir(tmp_path)[0])
+    with open(path, 'r+b') as replay:
+        replay.seek(4)
+        replay.write(bytes([0]))
+    with pytest.raises(ValueError):
+        Replay.load(path)
@@ -0,0 +1,114 @@
+import json
+
+import pytest
+
+from benchmarks.capture_corpus import CORPUS_PATH, check, engine_capture, replay
+from game_objects.board import Board
+from game_objects.territory import Territory
+
+
+@pytest.fixture(scope='module')
+def corpus():
+    with open(CORPUS_PATH) as f:
+        return json.load(f)
+
+
+def test_capture_corpus(corpus):
+    captures, _, mismatches = check(corpus)
+    assert captures > 0
+    assert mismatches == []
+
+
+def test_capture_diagonal_pockets(corpus):
+    # only the flood fill captures the pockets a tail closes by touching itself diagonally
+    walks = [walk for walk in corpus['walks'] if walk['fill_only']]
+    assert walks
+    for walk in walks:
+        results = replay(walk, tuple(corpus['size']), engine_capture)
+        for index, cells in walk['fill_only']:
+            assert set(map(tuple, cells)) <= results[index]
+
+
+def make_territory(rows, owner_id=1):
+    """
+    :param rows: strings of the board, '#' for a cell of the territory
+    """
+    board = Board(len(rows[0]), len(rows), 8)
+    territory = Territory(0, 0, None, board, owner_id)
+    territory.points.clear()
+    territory.points.update([(x, y) for y, row in enumerate(rows) for x, cell in enumerate(row) if cell == '#'])
+    return territory
+
+
+def get_points(rows):
+    return {(x, y) for y, row in enumerate(rows) for x, cell in enumerate(row) if cell == '#'}
+
+
+# a vertical cut through column 3 leaves a 3 cells wide part on the left and a 9 cells wide one on the right,
+# the 2 x 2 square in the bottom corner doesn't touch the cut and is always kept
+TERRITORY = [
+    '#############',
+    '#############',
+    '#############',
+    '#############',
+    '.............',
+    '##...........',
+    '##...........',
+]
+CUT = [(3, y) for y in range(4)]
+LEFT = {(x, y) for x in range(3) for y in range(4)}
+RIGHT = {(x, y) for x in range(4, 13) for y in range(4)}
+CORNER = {(0, 5), (1, 5), (0, 6), (1, 6)}
+
+
+def test_split_keeps_anchor_part():
+    territory = make_territory(TERRITORY)
+    released = territory.split(CUT, (0, 0))
+    assert set(released) == set(CUT) | RIGHT
+    assert set(territory.points) == LEFT | CORNER
+
+
+def test_split_keeps_largest_part_without_anchor():
+    territory = make_territory(TERRITORY)
+    released = territory.split(CUT, (6, 6))
+    assert set(released) == set(CUT) | LEFT
+    assert set(territory.points) == RIGHT | CORNER
+
+
+def test_split_anchor_in_largest_part():
+    territory = make_territory(TERRITORY)
+    released = territory.split(CUT, (10, 2))
+    assert set(released) == set(CUT) | LEFT
+    assert set(territory.points) == RIGHT | CORNER
+
+
+def test_split_without_separation():
+    territory = make_territory(TERRITORY)
+    released = territory.split([(3, 0), (3, 1)], (0, 0))
+    assert set(released) == {(3, 0), (3, 1)}
+    assert set(territory.points) == get_points(TERRITORY) - {(3, 0), (3, 1)}
+
+
+def test_split_merged_searches():
+    # the cut is a ring, the searches started inside of it meet and are released together
+    rows = [
+        '#######',
+        '#######',
+        '#######',
+        '#######',
+        '#######',
+    ]
+    territory = make_territory(rows)
+    ring = [(x, y) for x in range(1, 6) for y in range(1, 4) if x in (1, 5) or y in (1, 3)]
+    released = territory.split(ring, (0, 0))
+    inside = {(x, 2) for x in range(2, 5)}
+    assert set(released) == set(ring) | inside
+    assert set(territory.points) == get_points(rows) - set(ring) - inside
+
+
+def test_split_leaves_other_territories():
+    territory = make_territory(TERRITORY)
+    other = Territory(8, 6, None, territory.board, 2)
+    other_points = set(other.points)
+    territory.split(CUT, (0, 0))
+    assert set(other.points) == other_points